@@ -14,19 +14,26 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from __future__ import absolute_import
+import os
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 
+from datetime import datetime, timezone
 from enum import Enum
-from flask import jsonify
+from re import sub
+from threading import RLock, Thread
+from typing import Optional
+from flask import jsonify, abort
 from paho.mqtt import client as mqtt
 
 import octoprint.plugin
+from octoprint.access.permissions import Permissions
 from octoprint.events import Events
 
 from .manager import *
+from .service import *
 
 
 class FilamentBuddyPlugin(
@@ -40,75 +47,215 @@ class FilamentBuddyPlugin(
 ):
 
     REMOVING_TARGET_MIN_T = 5  # °C
+    TELEMETRY_TIME = 1  # s
 
-    def __init__(self):
+    def __init__(self, clock: Clock = None):
+        """
+        :param clock: the source of time for the plugin and its sensors, the system one if None
+        """
         super().__init__()
-        self.__is_gpio_available = is_gpio_available()
+        self._clock = Clock() if clock is None else clock
+        self.__gpio_probe = None
         self.__fs_manager = None
+        self.__fs_lock = RLock()
         self.__fr_state = FilamentBuddyPlugin.FRState.INACTIVE
+        self.__notifications = NotificationService(self.__send_plugin_message, clock=self._clock)
+        self.__telemetry = None
+        self.__telemetry_event = None
+        self.__shutting_down = False
+        self.__runout_pending = False
+        self.__resume_when_paused = False
+        self.__journal = None
 
     def on_after_startup(self):
-        self.__reset_plugin()
+        self.__journal = EventJournal(
+            self._logger,
+            os.path.join(self.get_plugin_data_folder(), "journal"),
+            clock=self._clock
+        )
+        self.__journal.start()
+        # Opening the sensor waits for the GPIO probe, which runs in background to not delay OctoPrint startup
+        self.__gpio_probe = GPIOCapabilityProbe(self._logger, self._clock)
+        self.__gpio_probe.start(
+            os.path.join(self.get_plugin_data_folder(), "gpio_capabilities.json"),
+            self.__on_gpio_probed
+        )
+        self.__initialize_filament_remover()
+        self.__initialize_telemetry()
         self._logger.info("Plugin ready")
 
     def on_shutdown(self):
-        if self.__fs_manager is not None:
-            self.__fs_manager.close()
+        self.__stop_telemetry()
+        if self.__gpio_probe is not None:
+            self.__gpio_probe.stop()
+        with self.__fs_lock:
+            # A probe still running must not open the sensor once it has been closed
+            self.__shutting_down = True
+            if self.__fs_manager is not None:
+                self.__fs_manager.close()
+                self.__fs_manager = None
+        if self.__journal is not None:
+            self.__journal.stop()
 
     def __reset_plugin(self):
         self.__initialize_filament_sensor()
         self.__initialize_filament_remover()
+        self.__initialize_telemetry()
+
+    def __on_gpio_probed(self):
+        with self.__fs_lock:
+            # A settings save during the probe has already opened the sensor
+            if self.__fs_manager is None and not self.__shutting_down:
+                self.__initialize_filament_sensor()
 
     def __initialize_filament_sensor(self):
-        if self.__fs_manager is not None:
-            self.__fs_manager.close()
-        self.__fs_manager = None
-        if not self.__is_gpio_available or not self.__get_bool("fs", "en"):
-            return
+        with self.__fs_lock:
+            if self.__fs_manager is not None:
+                self.__fs_manager.close()
+            self.__fs_manager = None
+            if not self._is_gpio_available() or not self.__get_bool("fs", "en"):
+                return
 
-        mode = self.__get_string("fs", "sensor_mode")
+            mode = self.__get_string("fs", "sensor_mode")
 
+            if mode in ["interrupt", "polling"]:
+                self._logger.info("Interrupt and polling modes have been deprecated")
+                return
+
+            self.__fs_manager = self._create_filament_sensor(
+                mode, self.__runout_action, *self.__get_reinsertion_parameters()
+            )
+            if self.__fs_manager is not None:
+                self.__fs_manager.set_state_listener(self.__on_sensor_state)
+            self.__enable_if_printing()
+
+    def _create_filament_sensor(self, mode: str, runout_f, reinsert_f, reinsert_time: float) \
+            -> Optional[GenericFilamentSensorManager]:
+        """
+        This method builds the filament sensor manager for the configured mode. It can be
+        overridden to use a different sensor, as the replay harness does with recorded traces.
+        :return: the manager or None if the settings do not allow to build it
+        """
         if mode == "p_polling":
-            self.__fs_manager = PeripheryPollingFilamentSensor(
+            return PeripheryPollingFilamentSensor(
                 self._logger,
-                self.__runout_action,
+                runout_f,
                 self.__get_int("fs", "sensor_pin"),
                 self.__get_int("fs", "polling_time"),
                 self.__get_int("fs", "run_out_time"),
                 self.__get_string("fs", "empty_voltage"),
-                self.__get_bool("fs", "invert_pull")
+                self.__get_bool("fs", "invert_pull"),
+                reinsert_f,
+                reinsert_time,
+                self._clock,
+                self._create_presence_filter()
             )
-            self.__enable_if_printing()
-            return
 
         if mode == "b_polling":
-            self.__fs_manager = BlinkaPollingFilamentSensor(
+            return BlinkaPollingFilamentSensor(
                 self._logger,
-                self.__runout_action,
+                runout_f,
                 self.__get_int("fs", "sensor_pin"),
                 self.__get_int("fs", "polling_time"),
                 self.__get_int("fs", "run_out_time"),
                 self.__get_string("fs", "empty_voltage"),
-                self.__get_bool("fs", "invert_pull")
+                self.__get_bool("fs", "invert_pull"),
+                reinsert_f,
+                reinsert_time,
+                self._clock,
+                self._create_presence_filter()
             )
-            self.__enable_if_printing()
-            return
 
-        if mode in ["interrupt", "polling"]:
-            self._logger.info("Interrupt and polling modes have been deprecated")
-            return
+        if mode == "hx711":
+            if self.__get_float("fs", "weight_scale") == 0:
+                self._logger.error("The load cell scale cannot be zero, the load cell has to be calibrated again")
+                return None
+            return HX711WeightFilamentSensor(
+                self._logger,
+                runout_f,
+                self.__send_weight_reading,
+                self.__get_int("fs", "sensor_pin"),
+                self.__get_int("fs", "clock_pin"),
+                self.__get_int("fs", "run_out_time"),
+                self.__get_int("fs", "weight_tare"),
+                self.__get_float("fs", "weight_scale"),
+                self.__get_int("fs", "weight_spool_mass"),
+                self.__get_int("fs", "weight_threshold"),
+                self.__get_int("fs", "toolbar_time"),
+                reinsert_f,
+                reinsert_time,
+                self._clock
+            )
 
         raise Exception(f"Implementation error: unknown FS type: {mode}")
 
+    def _create_presence_filter(self) -> PresenceFilter:
+        """
+        This method builds the filter between the raw reads of a binary sensor and its decisions.
+        When the filter is disabled or misconfigured, the sensor is read once, as without it.
+        """
+        if not self.__get_bool("fs", "filter_en"):
+            return PresenceFilter(clock=self._clock)
+        try:
+            return PresenceFilter(
+                self.__get_int("fs", "filter_window"),
+                self.__get_int("fs", "filter_missing_votes"),
+                self.__get_int("fs", "filter_return_votes"),
+                self.__get_int("fs", "filter_stable_time") / 1000,
+                self.__get_int("fs", "filter_sample_time") / 1000,
+                self._clock
+            )
+        except ValueError as e:
+            self._logger.error(f"Filter disabled: {e}")
+            return PresenceFilter(clock=self._clock)
+
+    def _is_gpio_available(self) -> bool:
+        # The settings defaults are requested before the startup, when the probe does not exist yet
+        if self.__gpio_probe is None:
+            return is_gpio_available()
+        return self.__gpio_probe.is_gpio_available()
+
+    def __get_reinsertion_parameters(self):
+        if not self.__get_bool("fs", "auto_resume"):
+            return None, 0
+        return self.__reinsert_action, self.__get_float("fs", "reinsert_time")
+
     def __runout_action(self):
+        self.__record_event("run_out", paused=self.__get_bool("fs", "use_pause"))
+        self.__publish_telemetry("last_run_out", datetime.fromtimestamp(self._clock.time(), timezone.utc).isoformat())
         if self.__get_bool("fs", "use_pause"):
+            self.__runout_pending = True
             self._printer.pause_print()
         self._printer.commands(
             [c.strip() for c in self.__get_string("fs", "run_out_command").split("\n")]
         )
-        self.__send_notification("The filament has run out", True)
+        self.__notifications.notify(
+            "The filament has run out", NotificationService.Severity.ERROR, key="fs.run_out", retain=True
+        )
         self.__send_mqtt_if_en()
 
+    def __reinsert_action(self):
+        if self._printer.is_pausing():
+            # The pause still waits for the queued moves, so the print is resumed when it completes
+            self._logger.info("Filament reinserted while pausing, the print will be resumed once paused")
+            self.__resume_when_paused = True
+            return
+        if not self._printer.is_paused():
+            self.__record_event("reinserted", resumed=False)
+            self._logger.info("Filament reinserted while the print is not paused, nothing to resume")
+            return
+        self.__resume_after_reinsertion()
+
+    def __resume_after_reinsertion(self):
+        self.__record_event("reinserted", resumed=True)
+        commands = [c.strip() for c in self.__get_string("fs", "reinsert_command").split("\n") if c.strip()]
+        if commands:
+            self._printer.commands(commands)
+            self._logger.info(f"Preparing the reinserted filament with: {commands}")
+        self._printer.resume_print()
+        self.__notifications.resolve("fs.run_out")
+        self.__notifications.notify("The filament has been reinserted, the print has been resumed", key="fs.resumed")
+
     def __send_mqtt_if_en(self):
         if not self.__get_bool("fs", "mqtt_en"):
             return
@@ -139,51 +286,149 @@ class FilamentBuddyPlugin(
             )
             info.wait_for_publish()
             client.disconnect()
-        except ConnectionRefusedError:
-            self._logger.info("Impossible to connect to MQTT broker")
-            self.__send_notification("Impossible to connect to MQTT broker")
+        except (OSError, ValueError) as e:
+            # Refused connections, timeouts, unknown hosts and invalid addresses
+            client.loop_stop()
+            self._logger.info(f"Impossible to connect to MQTT broker: {e}")
+            self.__record_event("mqtt_error", address=address, port=port, error=str(e))
+            self.__notifications.notify(
+                "Impossible to connect to MQTT broker", NotificationService.Severity.ERROR, key="mqtt.connection"
+            )
+
+    def __initialize_telemetry(self):
+        self.__stop_telemetry()
+        if not self.__get_bool("fs", "mqtt_en") or not self.__get_bool("fs", "mqtt_telemetry_en"):
+            return
+
+        self.__telemetry = MQTTTelemetry(
+            self._logger,
+            mqtt.Client,
+            self.__get_string("fs", "mqtt_address"),
+            self.__get_int("fs", "mqtt_port"),
+            self.__get_string("fs", "mqtt_base_topic"),
+            sub(r"[^A-Za-z0-9_-]", "_", self.__get_string("fs", "mqtt_client_id")),
+            self.__get_string("fs", "mqtt_username") if self.__get_bool("fs", "mqtt_use_login") else None,
+            self.__get_string("fs", "mqtt_password"),
+            self.__get_string("fs", "mqtt_discovery_prefix") if self.__get_bool("fs", "mqtt_discovery_en") else None,
+            clock=self._clock
+        )
+        try:
+            self.__telemetry.start()
+        except (OSError, ValueError) as e:
+            # As instance the empty default address, which paho refuses
+            self.__telemetry = None
+            self._logger.info(f"Impossible to start the MQTT telemetry: {e}")
+            self.__record_event("mqtt_error", address=self.__get_string("fs", "mqtt_address"),
+                                port=self.__get_int("fs", "mqtt_port"), error=str(e))
+            self.__notifications.notify(
+                "Impossible to connect to MQTT broker", NotificationService.Severity.ERROR, key="mqtt.connection"
+            )
+            return
+        self.__publish_telemetry("fr_state", self.__fr_state.name)
+        self.__publish_telemetry("pause_reason", None)
+        self.__telemetry_event = self._clock.event()
+        Thread(
+            target=self._clock.track(lambda event=self.__telemetry_event: self.__run_sensor_telemetry(event)),
+            name="FilamentBuddyTelemetry",
+            daemon=True
+        ).start()
+
+    def __stop_telemetry(self):
+        if self.__telemetry_event is not None:
+            self.__telemetry_event.set()
+            self.__telemetry_event = None
+        if self.__telemetry is not None:
+            self.__telemetry.stop()
+            self.__telemetry = None
+
+    def __run_sensor_telemetry(self, stop_event):
+        """
+        The sensor values are published periodically on the plugin clock, by a single thread
+        living as long as the telemetry. Every run has its own event, so a restart never
+        waits for the previous thread, which just ends at its next wake up.
+        """
+        while not stop_event.wait(FilamentBuddyPlugin.TELEMETRY_TIME):
+            try:
+                self.__publish_sensor_telemetry()
+            except Exception:
+                self._logger.exception("Impossible to publish the sensor telemetry")
+
+    def __publish_sensor_telemetry(self):
+        # The sensor may be replaced in the meantime by a settings save
+        fs_manager = self.__fs_manager
+        if fs_manager is None:
+            self.__publish_telemetry("filament", None)
+            self.__publish_telemetry("sensor_state", None)
+            self.__publish_telemetry("spool_weight", None)
+            return
+        self.__publish_telemetry("filament", fs_manager.is_filament_present())
+        self.__publish_telemetry("sensor_state", fs_manager.get_state().name)
+        self.__publish_telemetry("spool_weight", fs_manager.get_details().get("weight"))
+
+    def __publish_telemetry(self, name: str, value):
+        telemetry = self.__telemetry
+        if telemetry is not None:
+            telemetry.publish(name, value)
+
+    def __set_fr_state(self, state: "FilamentBuddyPlugin.FRState"):
+        self.__fr_state = state
+        self.__publish_telemetry("fr_state", state.name)
 
     def __enable_if_printing(self):
-        if self._printer.is_printing():
+        if self.__fs_manager is not None and self._printer.is_printing():
             self.__fs_manager.start_checking()
 
     def __initialize_filament_remover(self):
         if (self.__get_bool("fr", "en")
                 and "temperature" == self.__get_string("fr", "hook_mode")
                 and (self._printer.is_printing() or self._printer.is_pausing() or self._printer.is_paused())):
-            self.__fr_state = FilamentBuddyPlugin.FRState.WAIT_FOR_REMOVING
+            self.__set_fr_state(FilamentBuddyPlugin.FRState.WAIT_FOR_REMOVING)
             return
-        self.__fr_state = FilamentBuddyPlugin.FRState.INACTIVE
+        self.__set_fr_state(FilamentBuddyPlugin.FRState.INACTIVE)
 
     def on_event(self, event, payload):
         if not event.startswith("Print"):
             return
 
+        if event in FilamentBuddyPlugin.JOURNALED_EVENTS:
+            details = {}
+            if Events.PRINT_PAUSED == event:
+                details["reason"] = "filament_run_out" if self.__runout_pending else "user"
+            self.__record_event(FilamentBuddyPlugin.JOURNALED_EVENTS[event], **details)
+
         if Events.PRINT_STARTED == event:
+            self.__resume_when_paused = False
             if self.__fs_manager is not None:
                 self.__fs_manager.start_checking()
-                if not self.__fs_manager.is_currently_available():
-                    self.__send_notification("Filament not found, starting run out timeout")
             if self.__get_bool("fr", "en"):
                 if "outside" == self.__get_string("fr", "hook_mode"):
                     self.__insert_filament()
                 else:
-                    self.__fr_state = FilamentBuddyPlugin.FRState.WAIT_FOR_INSERTING
+                    self.__set_fr_state(FilamentBuddyPlugin.FRState.WAIT_FOR_INSERTING)
             return
 
         if Events.PRINT_PAUSED == event:
-            if self.__fs_manager is not None:
+            self.__publish_telemetry("pause_reason", "filament_run_out" if self.__runout_pending else "user")
+            self.__runout_pending = False
+            if self.__resume_when_paused:
+                self.__resume_when_paused = False
+                self.__resume_after_reinsertion()
+                return
+            # After a run out, the sensor keeps watching the filament to resume the print by itself
+            if self.__fs_manager is not None and not self.__fs_manager.is_waiting_reinsertion():
                 self.__fs_manager.stop_checking()
             return
 
         if Events.PRINT_RESUMED == event:
+            self.__publish_telemetry("pause_reason", None)
+            self.__notifications.resolve("fs.run_out")
             if self.__fs_manager is not None:
                 self.__fs_manager.start_checking()
-                if not self.__fs_manager.is_currently_available():
-                    self.__send_notification("Filament not found, starting run out timeout")
             return
 
         if event in (Events.PRINT_DONE, Events.PRINT_FAILED):
+            self.__resume_when_paused = False
+            self.__notifications.resolve("fs.missing", "fs.run_out")
             if self.__fs_manager is not None:
                 self.__fs_manager.stop_checking()
             if self.__get_bool("fr", "en"):
@@ -195,6 +440,13 @@ class FilamentBuddyPlugin(
                     self.__initialize_filament_remover()
             return
 
+    def __on_sensor_state(self, state: GenericFilamentSensorManager.State):
+        # The missing alert lasts as long as the run out timeout, which runs only in the MISSING state
+        if state == GenericFilamentSensorManager.State.MISSING:
+            self.__notifications.notify("Filament not found, starting run out timeout", key="fs.missing", retain=True)
+        else:
+            self.__notifications.resolve("fs.missing")
+
     def on_temperature_received(self, comm_instance, parsed_temperatures, *args, **kwargs):
         if (self.__fr_state == FilamentBuddyPlugin.FRState.INACTIVE or
                 not self._printer.is_printing() or
@@ -210,12 +462,12 @@ class FilamentBuddyPlugin(
         if self.__fr_state == FilamentBuddyPlugin.FRState.WAIT_FOR_INSERTING:
             if current_t > self.__get_int("fr", "min_needed_temp"):
                 self.__insert_filament()
-                self.__fr_state = FilamentBuddyPlugin.FRState.WAIT_FOR_REMOVING
+                self.__set_fr_state(FilamentBuddyPlugin.FRState.WAIT_FOR_REMOVING)
         else:
             # Necessarily WAIT_FOR_REMOVAL
             if target_t < FilamentBuddyPlugin.REMOVING_TARGET_MIN_T:
                 self.__remove_filament()
-                self.__fr_state = FilamentBuddyPlugin.FRState.INACTIVE
+                self.__set_fr_state(FilamentBuddyPlugin.FRState.INACTIVE)
 
         return parsed_temperatures
 
@@ -237,6 +489,8 @@ class FilamentBuddyPlugin(
         )
         self._printer.commands(commands)
         self._logger.info(f"Removing filament with: {commands}")
+        self.__record_event("fr_remove", commands=commands)
+        self.__publish_telemetry("fr_last_action", "remove")
 
     def __insert_filament(self):
         length = self.__get_int("fr", "extrude_length")
@@ -248,29 +502,108 @@ class FilamentBuddyPlugin(
         )
         self._printer.commands(commands)
         self._logger.info(f"Inserting filament with: {commands}")
+        self.__record_event("fr_insert", commands=commands)
+        self.__publish_telemetry("fr_last_action", "insert")
 
     def get_api_commands(self):
         return dict(
             filament_status=[],
-            test_mqtt=[]
+            sensor_transitions=[],
+            active_notifications=[],
+            gpio_capabilities=[],
+            journal_query=[],
+            journal_stats=[],
+            test_mqtt=[],
+            weight_tare=[],
+            weight_calibrate=["mass"]
         )
 
     def on_api_command(self, command, data):
         if command == "filament_status":
             return jsonify({
                 'state': self.__fs_manager is not None,
-                'filament': None if self.__fs_manager is None else self.__fs_manager.is_currently_available()
+                'filament': None if self.__fs_manager is None else self.__fs_manager.is_filament_present(),
+                'details': {} if self.__fs_manager is None else self.__fs_manager.get_details(),
+                'sensor_state': None if self.__fs_manager is None else self.__fs_manager.get_state().name
             })
 
+        if command == "sensor_transitions":
+            return jsonify({
+                'transitions': [] if self.__fs_manager is None else self.__fs_manager.get_transitions()
+            })
+
+        if command == "active_notifications":
+            return jsonify({'notifications': self.__notifications.get_active()})
+
+        if command == "gpio_capabilities":
+            return jsonify({
+                'capabilities': None if self.__gpio_probe is None else self.__gpio_probe.get_capabilities(),
+                'blinka_pins': list(BlinkaPollingFilamentSensor.get_board_pins())
+            })
+
+        if command in ("journal_query", "journal_stats"):
+            if self.__journal is None:
+                abort(409, description="The journal is not ready")
+            try:
+                start = None if data.get("start") is None else float(data["start"])
+                end = None if data.get("end") is None else float(data["end"])
+                if command == "journal_stats":
+                    return jsonify({'stats': self.__journal.stats(start, end)})
+                limit = None if data.get("limit") is None else int(data["limit"])
+                types = data.get("types")
+                if types is not None and (not isinstance(types, list) or
+                                          not all(isinstance(event_type, str) for event_type in types)):
+                    raise ValueError("The types must be a list of event types")
+                return jsonify({
+                    'records': self.__journal.query(start, end, types, limit),
+                    'dropped': self.__journal.get_dropped()
+                })
+            except (TypeError, ValueError) as e:
+                abort(400, description=str(e))
+
         if command == "test_mqtt":
             self.__send_mqtt_if_en()
             return jsonify({})
 
+        if command in ("weight_tare", "weight_calibrate"):
+            # These commands overwrite the settings, so they require the same permission of the settings page
+            if not Permissions.SETTINGS.can():
+                abort(403, description="Insufficient rights")
+            if not isinstance(self.__fs_manager, HX711WeightFilamentSensor):
+                abort(409, description="The load cell is not active")
+            try:
+                if command == "weight_tare":
+                    self._settings.set(["fs", "weight_tare"], self.__fs_manager.tare())
+                else:
+                    self._settings.set(["fs", "weight_scale"], self.__fs_manager.calibrate(float(data["mass"])))
+            except ValueError as e:
+                abort(400, description=str(e))
+            self._settings.save()
+            return jsonify({
+                'weight_tare': self.__get_int("fs", "weight_tare"),
+                'weight_scale': self.__get_float("fs", "weight_scale")
+            })
+
         self._logger.info("API request unknown: " + command)
         return None
 
-    def __send_notification(self, message: str, is_severe: bool = False):
-        self._plugin_manager.send_plugin_message("filamentbuddy", {"message": message, "is_severe": is_severe})
+    def __record_event(self, event_type: str, **data):
+        if self.__journal is None:
+            return
+        job = self._printer.get_current_job() or {}
+        progress = self._printer.get_current_data().get("progress") or {}
+        self.__journal.record(
+            event_type,
+            job=(job.get("file") or {}).get("name"),
+            progress=progress.get("completion"),
+            **data
+        )
+
+    def __send_plugin_message(self, data: dict):
+        self._plugin_manager.send_plugin_message("filamentbuddy", data)
+
+    def __send_weight_reading(self, grams: float):
+        self.__send_plugin_message({"type": "weight", "weight": grams})
 
     def __get_raw_value(self, source: Literal["fc", "fs", "fr"], param):
         modified = self._settings.get([source])
@@ -290,6 +623,14 @@ class FilamentBuddyPlugin(
     def __get_string(self, source: Literal["fc", "fs", "fr"], param: str) -> str:
         return str(self.__get_raw_value(source, param))
 
+    JOURNALED_EVENTS = {
+        Events.PRINT_STARTED: "print_started",
+        Events.PRINT_PAUSED: "print_paused",
+        Events.PRINT_RESUMED: "print_resumed",
+        Events.PRINT_DONE: "print_done",
+        Events.PRINT_FAILED: "print_failed"
+    }
+
     DEFAULT_SETTINGS = {
         "first_startup": True,
 
@@ -319,8 +660,22 @@ class FilamentBuddyPlugin(
             "run_out_time": 60,  # s
             "use_pause": True,
             "run_out_command": "",
+            "auto_resume": False,
+            "reinsert_time": 3,  # s
+            "reinsert_command": "",
             "empty_voltage": "low",
             "invert_pull": False,
+            "filter_en": False,
+            "filter_window": 5,  # samples
+            "filter_missing_votes": 4,  # samples
+            "filter_return_votes": 5,  # samples
+            "filter_stable_time": 100,  # ms
+            "filter_sample_time": 5,  # ms
+            "clock_pin": 6,
+            "weight_tare": 0,  # raw units
+            "weight_scale": 1.0,  # raw units/g
+            "weight_spool_mass": 200,  # g
+            "weight_threshold": 20,  # g
             "toolbar_time": 4,  # s
             "toolbar_en": True,
             "mqtt_en": False,
@@ -331,7 +686,11 @@ class FilamentBuddyPlugin(
             "mqtt_username": "",
             "mqtt_password": "",
             "mqtt_topic": "FilamentBuddy",
-            "mqtt_message_string": "Filament is over"
+            "mqtt_message_string": "Filament is over",
+            "mqtt_telemetry_en": False,
+            "mqtt_base_topic": "filamentbuddy",
+            "mqtt_discovery_en": True,
+            "mqtt_discovery_prefix": "homeassistant"
         },
 
         # Filament Remover
@@ -353,13 +712,13 @@ class FilamentBuddyPlugin(
         return {
             **FilamentBuddyPlugin.DEFAULT_SETTINGS,
             **{
-                "is_gpio_available": self.__is_gpio_available,
+                "is_gpio_available": self._is_gpio_available(),
                 "default": FilamentBuddyPlugin.DEFAULT_SETTINGS
             }
         }
 
     def on_settings_save(self, data):
-        data["is_gpio_available"] = self.__is_gpio_available
+        data["is_gpio_available"] = self._is_gpio_available()
         data["default"] = FilamentBuddyPlugin.DEFAULT_SETTINGS
         octoprint.plugin.SettingsPlugin.on_settings_save(self, data)
         self.__reset_plugin()
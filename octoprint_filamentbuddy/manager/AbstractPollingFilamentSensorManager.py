@@ -13,30 +13,46 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from abc import abstractmethod
-from threading import Event
 
+from .Clock import Clock
 from .GenericFilamentSensorManager import GenericFilamentSensorManager
+from .PresenceFilter import PresenceFilter
 
 
 class AbstractPollingFilamentSensorManager(GenericFilamentSensorManager):
-    BOUNCE_TIME = 1  # ms
     VERIFYING_TIME = 1  # s
+    WATCHING_TIME = 0.01  # s
 
-    def __init__(self, logger, runout_f, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool):
-        super().__init__(logger, runout_f)
+    def __init__(self, logger, runout_f, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool,
+                 reinsert_f=None, reinsert_time: float = 0, clock: Clock = None,
+                 presence_filter: PresenceFilter = None):
+        """
+        :param presence_filter: the filter between the raw reads and the decisions, a single read if None
+        """
+        super().__init__(logger, runout_f, reinsert_f, clock)
         self.__polling_time = polling_time
         self.__runout_time = runout_time
+        self.__reinsert_time = reinsert_time
         self._is_empty_high = "high".__eq__(empty_v.lower())
         self._invert_pull = invert_pull
+        self.__filter = PresenceFilter(clock=self._clock) if presence_filter is None else presence_filter
         self.__event = None
         self.__running = False
         self.__verifying = False
+        self.__watching = False
 
     def start_checking(self):
         if self.__running:
+            if self.__watching:
+                # The polling goes back to the run out check as soon as the watch ends
+                self.__watching = False
+                self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                self._log("Filament Sensor via polling no more waiting for the reinsertion")
             return
         self.__running = True
-        self.__event = Event()
+        self.__event = self._clock.event()
+        self.__filter.reset()
+        self._set_state(GenericFilamentSensorManager.State.MONITORING)
         self._log("Filament Sensor via polling started")
         self._submit(self.__perform_polling)
 
@@ -45,7 +61,9 @@ class AbstractPollingFilamentSensorManager(GenericFilamentSensorManager):
             return
         self.__running = False
         self.__verifying = False
+        self.__watching = False
         self.__event.set()
+        self._set_state(GenericFilamentSensorManager.State.STOPPED)
         self._log("Filament Sensor via polling stopped")
 
     def __perform_polling(self):
@@ -55,25 +73,71 @@ class AbstractPollingFilamentSensorManager(GenericFilamentSensorManager):
                 break
 
             # if the filament becomes unavailable
-            if not self.is_currently_available():
+            if not self.__is_filament_present():
                 self.__verifying = True
                 count = 0
+                self._set_state(GenericFilamentSensorManager.State.MISSING)
                 self.__event.wait(AbstractPollingFilamentSensorManager.VERIFYING_TIME)
                 self._log("First missing filament")
                 while self.__verifying:
-                    if self.is_currently_available():
+                    if self.__is_filament_present():
                         # the filament came back before the deadline
                         self.__verifying = False
+                        self._set_state(GenericFilamentSensorManager.State.MONITORING)
                         self._log("Filament has returned")
                         continue
                     if count * AbstractPollingFilamentSensorManager.VERIFYING_TIME >= self.__runout_time:
                         self._log("Run out time passed, printer paused")
+                        # Set before the run out, so a resume while it runs ends the watch
+                        self.__watching = self._is_reinsertion_watched()
+                        # The state has to change before the run out, which pauses the print
+                        self._set_state(GenericFilamentSensorManager.State.RUN_OUT)
                         self._runout()
-                        self.stop_checking()
-                        return
+                        if not self._is_reinsertion_watched():
+                            self.stop_checking()
+                            return
+                        self.__verifying = False
+                        self.__watch_reinsertion()
+                        continue
                     count += 1
                     self.__event.wait(AbstractPollingFilamentSensorManager.VERIFYING_TIME)
 
+    def __watch_reinsertion(self):
+        """
+        After a run out, the pin is read at a high rate until the filament stays inserted
+        for the whole reinsertion time, so the print is resumed as soon as this window ends.
+        """
+        inserted_since = None
+        while self.__running and self.__watching:
+            if not self.__is_filament_present():
+                inserted_since = None
+            elif inserted_since is None:
+                inserted_since = self._clock.monotonic()
+                self._log("Filament inserted, waiting for it to be stable")
+            elif self._clock.monotonic() - inserted_since >= self.__reinsert_time:
+                self.__watching = False
+                self._set_state(GenericFilamentSensorManager.State.REINSERTED)
+                self._reinsert()
+                if self.__running:
+                    self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                return
+            self.__event.wait(AbstractPollingFilamentSensorManager.WATCHING_TIME)
+
+    def __is_filament_present(self) -> bool:
+        """
+        This method reads the sensor through the filter, and the burst stops as soon as
+        the sensing is stopped, since it waits on the same event.
+        """
+        return self.__filter.update(self.is_currently_available, self.__event.wait)
+
+    def is_filament_present(self) -> bool:
+        # While stopped nothing is decided, so the sensor is read directly
+        if not self.__running:
+            return self.is_currently_available()
+        return self.__filter.present
+
+    def get_details(self) -> dict:
+        return {"filter": self.__filter.get_statistics()}
 
     def close(self):
         if self.__running:
@@ -13,16 +13,24 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+from functools import lru_cache
 from re import fullmatch
 import digitalio
 import board
 from .AbstractPollingFilamentSensorManager import AbstractPollingFilamentSensorManager
+from .Clock import Clock
+from .PresenceFilter import PresenceFilter
 from .support import GPIONotFoundException
 
 
 class BlinkaPollingFilamentSensor(AbstractPollingFilamentSensorManager):
-    def __init__(self, logger, runout_f, pin: int, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool):
-        super().__init__(logger, runout_f, polling_time, runout_time, empty_v, invert_pull)
+    def __init__(self, logger, runout_f, pin: int, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool,
+                 reinsert_f=None, reinsert_time: float = 0, clock: Clock = None,
+                 presence_filter: PresenceFilter = None):
+        super().__init__(
+            logger, runout_f, polling_time, runout_time, empty_v, invert_pull, reinsert_f, reinsert_time, clock,
+            presence_filter
+        )
 
         pin_attr = f"D{pin}"
         try:
@@ -39,14 +47,22 @@ class BlinkaPollingFilamentSensor(AbstractPollingFilamentSensorManager):
         except (AttributeError, ValueError, ImportError):
             raise GPIONotFoundException()
 
-        self.__available_pins = [int(attr[1:]) for attr in dir(board) if fullmatch(r"D\d+", attr)]
         self._log("Blinka polling successfully initialized")
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_board_pins() -> tuple:
+        """
+        The board module does not change while running, so its pins are listed only once.
+        :return: the BCM numbers of the board digital pins
+        """
+        return tuple(sorted(int(attr[1:]) for attr in dir(board) if fullmatch(r"D\d+", attr)))
+
     def verify_if_pin_exists(self, pin: int) -> bool:
-        return pin in self.__available_pins
+        return pin in BlinkaPollingFilamentSensor.get_board_pins()
 
     def get_bcm_pins_list(self):
-        return self.__available_pins[:]
+        return list(BlinkaPollingFilamentSensor.get_board_pins())
 
     def is_currently_available(self):
         return bool(self.__input_device.value) ^ self._is_empty_high
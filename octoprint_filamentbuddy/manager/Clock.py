@@ -0,0 +1,211 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import heapq
+from itertools import count
+from threading import Condition, Event, Timer
+from time import monotonic, time
+
+
+class Clock:
+    """
+    This class is the source of time for the managers and the plugin. It measures the
+    time, creates the events used to wait and schedules the delayed actions, so that a
+    different implementation, like VirtualClock, can run them on a simulated time.
+    This implementation simply uses the system time.
+    """
+
+    def time(self) -> float:
+        """
+        :return: the current UNIX time in seconds
+        """
+        return time()
+
+    def monotonic(self) -> float:
+        """
+        :return: a time in seconds that can be used only to measure intervals
+        """
+        return monotonic()
+
+    def event(self):
+        """
+        :return: a new event, whose wait method follows this clock
+        """
+        return Event()
+
+    def schedule(self, delay: float, action) -> None:
+        """
+        This method runs an action once, after a certain time, in a different thread.
+        :param delay: the time in seconds before running the action
+        :param action: the function to run
+        """
+        timer = Timer(delay, action)
+        timer.daemon = True
+        timer.start()
+
+    def track(self, action):
+        """
+        This method has to wrap every function run in a thread that waits on this clock,
+        so that a simulated clock knows when that thread is running.
+        :param action: the function that will run in a thread
+        :return: the function to submit in its place
+        """
+        return action
+
+
+class VirtualClock(Clock):
+    """
+    This clock moves only when advanced, while the threads waiting on its events are
+    released in the deadlines order. Before moving to the next deadline, it waits for all
+    the tracked threads to be blocked again, so a simulation is deterministic and an hour
+    of waits lasts just the time of the code that runs in the meantime.
+    """
+
+    def __init__(self, start_time: float = 0.0):
+        """
+        :param start_time: the UNIX time corresponding to the clock start
+        """
+        self.__condition = Condition()
+        self.__start_time = start_time
+        self.__now = 0.0
+        self.__busy = 0
+        self.__waiters = []
+        self.__scheduled = []
+        self.__sequence = count()
+
+    def time(self) -> float:
+        return self.__start_time + self.__now
+
+    def monotonic(self) -> float:
+        return self.__now
+
+    def event(self):
+        return VirtualClock.VirtualEvent(self)
+
+    def schedule(self, delay: float, action) -> None:
+        with self.__condition:
+            heapq.heappush(self.__scheduled, (self.__now + max(delay, 0), next(self.__sequence), action))
+
+    def track(self, action):
+        with self.__condition:
+            self.__busy += 1
+
+        def tracked():
+            try:
+                action()
+            finally:
+                with self.__condition:
+                    self.__busy -= 1
+                    self.__condition.notify_all()
+
+        return tracked
+
+    def advance(self, seconds: float) -> None:
+        """
+        This method moves the clock forward, releasing the waiting threads and running
+        the scheduled actions in order. The scheduled actions run in the calling thread.
+        :param seconds: the time to advance
+        """
+        self.advance_to(self.__now + seconds)
+
+    def advance_to(self, target: float) -> None:
+        """
+        This is the same of advance but with the final clock time.
+        :param target: the clock time, in seconds from the start, to reach
+        """
+        while True:
+            with self.__condition:
+                self.__wait_idle()
+                deadlines = [waiter.deadline for waiter in self.__waiters]
+                if self.__scheduled:
+                    deadlines.append(self.__scheduled[0][0])
+                deadline = min(deadlines, default=None)
+                if deadline is None or deadline > target:
+                    self.__now = max(self.__now, target)
+                    return
+
+                self.__now = max(self.__now, deadline)
+                actions = []
+                while self.__scheduled and self.__scheduled[0][0] <= self.__now:
+                    actions.append(heapq.heappop(self.__scheduled)[2])
+                if not actions:
+                    self.__release(lambda waiter: waiter.deadline <= self.__now)
+
+            for action in actions:
+                action()
+
+    def settle(self) -> None:
+        """
+        This method waits for all the tracked threads to be blocked on this clock.
+        """
+        with self.__condition:
+            self.__wait_idle()
+
+    def _wait(self, event: "VirtualClock.VirtualEvent", timeout) -> bool:
+        with self.__condition:
+            if event.is_set():
+                return True
+            deadline = float("inf") if timeout is None else self.__now + timeout
+            waiter = VirtualClock.Waiter(event, deadline)
+            self.__waiters.append(waiter)
+            self.__busy -= 1
+            self.__condition.notify_all()
+            while not waiter.released:
+                self.__condition.wait()
+            return event.is_set()
+
+    def _notify_set(self, event: "VirtualClock.VirtualEvent") -> None:
+        with self.__condition:
+            self.__release(lambda waiter: waiter.event is event)
+
+    def __release(self, condition) -> None:
+        released = [waiter for waiter in self.__waiters if condition(waiter)]
+        for waiter in released:
+            self.__waiters.remove(waiter)
+            waiter.released = True
+            self.__busy += 1
+        if released:
+            self.__condition.notify_all()
+
+    def __wait_idle(self) -> None:
+        while self.__busy > 0:
+            self.__condition.wait()
+
+    class Waiter:
+        def __init__(self, event: "VirtualClock.VirtualEvent", deadline: float):
+            self.event = event
+            self.deadline = deadline
+            self.released = False
+
+    class VirtualEvent:
+        """
+        This is the VirtualClock version of threading.Event, for the methods used here.
+        """
+
+        def __init__(self, clock: "VirtualClock"):
+            self.__clock = clock
+            self.__flag = False
+
+        def is_set(self) -> bool:
+            return self.__flag
+
+        def set(self) -> None:
+            self.__flag = True
+            self.__clock._notify_set(self)
+
+        def clear(self) -> None:
+            self.__flag = False
+
+        def wait(self, timeout: float = None) -> bool:
+            return self.__clock._wait(self, timeout)
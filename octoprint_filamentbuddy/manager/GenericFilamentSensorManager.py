@@ -14,7 +14,11 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from abc import ABC, abstractmethod
+from collections import deque
 from concurrent.futures.thread import ThreadPoolExecutor
+from enum import Enum
+
+from .Clock import Clock
 
 
 class GenericFilamentSensorManager(ABC):
@@ -25,23 +29,35 @@ class GenericFilamentSensorManager(ABC):
     plugin uses only the public methods here defined that the extender has to implement.
     """
 
-    def __init__(self, logger, runout_f):
+    TRANSITIONS_SIZE = 50
+
+    def __init__(self, logger, runout_f, reinsert_f=None, clock: Clock = None):
         """
         The constructor requires just two essential parameters, since the filament sensor
         specific ones are taken directly by the extender. This because these could be very
         different from one sensor to another.
         :param logger: an instance of OctoPrint logger
         :param runout_f: this is the action to perform when the filament is over
+        :param reinsert_f: this is the action to perform when the filament is inserted again
+                           after a run out, if None the sensor stops after the run out
+        :param clock: the source of time, the system one if None
         """
         self.__pool = ThreadPoolExecutor(max_workers=1)
         self.__logger = logger
         self.__runout_f = runout_f
+        self.__reinsert_f = reinsert_f
+        self._clock = Clock() if clock is None else clock
+        self.__state = GenericFilamentSensorManager.State.STOPPED
+        self.__state_f = None
+        self.__transitions = deque(maxlen=GenericFilamentSensorManager.TRANSITIONS_SIZE)
 
     @abstractmethod
     def start_checking(self) -> None:
         """
         This method has to be invoked when the filament sensing has to start. Consequently,
         the extender has to define here what is needed to do to launch the sensing process.
+        If the sensor is waiting for a reinsertion, as when the print is resumed by hand
+        after a run out, the extender has to stop waiting and go back to monitoring.
         """
         pass
 
@@ -62,6 +78,54 @@ class GenericFilamentSensorManager(ABC):
         """
         pass
 
+    def is_filament_present(self) -> bool:
+        """
+        This method returns the filament availability as the sensing decided it, so after
+        any filtering of the extender, and it is the one to publish. The default implementation
+        reads the sensor, which is right for the extenders filtering inside is_currently_available.
+        :return: true if the filament is available, otherwise false
+        """
+        return self.is_currently_available()
+
+    def is_waiting_reinsertion(self) -> bool:
+        """
+        After a run out, the sensor keeps watching the filament if a reinsertion action has
+        been defined. In this state, the print has been paused by the sensor itself, so the
+        plugin must not stop the sensing when it receives the pause event.
+        :return: true if the sensor is waiting for the filament to come back
+        """
+        return self.__reinsert_f is not None and self.__state == GenericFilamentSensorManager.State.RUN_OUT
+
+    def get_state(self) -> "GenericFilamentSensorManager.State":
+        """
+        :return: the current sensing state
+        """
+        return self.__state
+
+    def set_state_listener(self, state_f) -> None:
+        """
+        This method registers the action to perform at every sensing state change, as
+        instance to withdraw a missing filament alert when the filament comes back.
+        :param state_f: the action receiving the new state, it runs in the sensing thread
+        """
+        self.__state_f = state_f
+
+    def get_transitions(self) -> list:
+        """
+        This method returns the last state transitions, from the oldest to the newest.
+        :return: a list of dictionaries with the transition UNIX time and the new state name
+        """
+        return list(self.__transitions)
+
+    def get_details(self) -> dict:
+        """
+        This method returns the sensor specific information to show in the user interface,
+        as instance the spool weight for a load cell. The extender can override it to add
+        its own values, while the default implementation has nothing to report.
+        :return: a dictionary that can be serialized as JSON
+        """
+        return {}
+
     @abstractmethod
     def close(self) -> None:
         """
@@ -77,7 +141,7 @@ class GenericFilamentSensorManager(ABC):
         callbacks. This method is the way to use it.
         :param to_run: the action to run in the ThreadPool
         """
-        self.__pool.submit(to_run)
+        self.__pool.submit(self._clock.track(to_run))
 
     def _close_pool(self) -> None:
         """
@@ -92,8 +156,61 @@ class GenericFilamentSensorManager(ABC):
         """
         self.__logger.info(message)
 
+    def _log_error(self, message: str) -> None:
+        """
+        This method logs a problem of the sensor itself, which the user has to fix.
+        :param message: the string to log
+        """
+        self.__logger.error(message)
+
     def _runout(self) -> None:
         """
         This is the method to invoke when the extender find out the filament has run out.
+        An error of the action is logged, so the extender can still watch or stop the sensing.
         """
-        self.__runout_f()
+        try:
+            self.__runout_f()
+        except Exception:
+            self.__logger.exception("Error while handling the filament run out")
+
+    def _is_reinsertion_watched(self) -> bool:
+        """
+        :return: true if the extender has to keep watching the filament after a run out
+        """
+        return self.__reinsert_f is not None
+
+    def _reinsert(self) -> None:
+        """
+        This is the method to invoke when the extender find out the filament has been
+        stably inserted again after a run out. As for the run out, an error of the action is logged.
+        """
+        if self.__reinsert_f is None:
+            return
+        try:
+            self.__reinsert_f()
+        except Exception:
+            self.__logger.exception("Error while handling the filament reinsertion")
+
+    def _set_state(self, state: "GenericFilamentSensorManager.State") -> None:
+        """
+        The extender has to invoke this method at every sensing state change, so that the
+        transitions are logged and can be reported by the plugin.
+        :param state: the new state
+        """
+        if state == self.__state:
+            return
+        self.__state = state
+        self.__transitions.append({"time": self._clock.time(), "state": state.name})
+        self._log(f"Filament Sensor state: {state.name}")
+        if self.__state_f is not None:
+            try:
+                self.__state_f(state)
+            except Exception:
+                self.__logger.exception("Error while handling the sensing state change")
+
+    class State(Enum):
+        STOPPED = 0
+        MONITORING = 1
+        MISSING = 2
+        RUN_OUT = 3
+        REINSERTED = 4
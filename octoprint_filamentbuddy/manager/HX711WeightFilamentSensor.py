@@ -0,0 +1,283 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from threading import Event
+from typing import Optional
+
+from periphery import GPIO
+
+from .Clock import Clock
+from .GenericFilamentSensorManager import GenericFilamentSensorManager
+from .StreamingWeightFilter import StreamingWeightFilter
+from .support import GPIONotFoundException
+
+
+class HX711WeightFilamentSensor(GenericFilamentSensorManager):
+    """
+    This sensor weighs the spool through a load cell connected to an HX711 amplifier.
+    The filament is considered available while the remaining filament, so the measured
+    weight without the empty spool, stays over a threshold. Differently from the polling
+    sensors, the load cell is sampled for all the instance life, since its readings are
+    also streamed to the user interface, while the run out is checked only when needed.
+    """
+
+    SAMPLE_TIME = 0.1  # s, the HX711 default output rate is 10 Hz
+    READY_TIMEOUT = 0.5  # s
+    READY_CHECK_TIME = 0.002  # s
+    GAIN_PULSES = 1  # channel A, gain 128
+    INVALID_VALUES = (0x7FFFFF, -0x800000)  # saturated or disconnected amplifier
+    NO_READING_TIME = 2  # s, without valid conversions the load cell is considered faulty
+    MIN_STREAM_DELTA = 1  # g
+
+    __DATA_BITS = range(24)
+    __GAIN_BITS = range(GAIN_PULSES)
+
+    def __init__(self, logger, runout_f, reading_f, data_pin: int, clock_pin: int, runout_time: int,
+                 tare: int, scale: float, spool_mass: int, threshold: int, stream_time: int,
+                 reinsert_f=None, reinsert_time: float = 0, clock: Clock = None):
+        """
+        :param reading_f: the action that receives the remaining filament in grams when it changes,
+                          or None when the load cell stops producing readings
+        :param data_pin: the BCM pin connected to the HX711 DOUT
+        :param clock_pin: the BCM pin connected to the HX711 PD_SCK
+        :param tare: the raw value read when the spool holder is empty
+        :param scale: the raw units corresponding to one gram
+        :param spool_mass: the empty spool mass in grams
+        :param threshold: the remaining filament in grams under which the filament is over
+        :param stream_time: the minimum time in seconds between two streamed readings
+        :param reinsert_time: the time in seconds a new spool has to stay over the threshold to be reinserted
+        """
+        super().__init__(logger, runout_f, reinsert_f, clock)
+        if scale == 0:
+            raise ValueError("The load cell scale cannot be zero")
+
+        self.__reading_f = reading_f
+        self.__runout_time = runout_time
+        self.__reinsert_time = reinsert_time
+        self.__tare = tare
+        self.__scale = scale
+        self.__spool_mass = spool_mass
+        self.__threshold = threshold
+        self.__stream_time = stream_time
+        self.__filter = StreamingWeightFilter()
+        self.__read_at = None
+        self.__event = self._clock.event()
+        # Waited by the thread closing the sensor, so it is a real event also with a virtual clock
+        self.__stopped = Event()
+        self.__closed = False
+        self.__checking = False
+
+        self._open_device(data_pin, clock_pin)
+        self._submit(self.__perform_sampling)
+        self._log("HX711 weight sensor successfully initialized")
+
+    def _open_device(self, data_pin: int, clock_pin: int) -> None:
+        try:
+            self.__dout = GPIO("/dev/gpiochip0", data_pin, "in")
+            self.__pd_sck = GPIO("/dev/gpiochip0", clock_pin, "low")
+        except ImportError:
+            raise GPIONotFoundException()
+
+    def _read_raw(self) -> Optional[int]:
+        """
+        This method reads one conversion from the HX711, following its serial protocol.
+        The wait for the conversion is done on the event, so the GIL is released in the
+        meantime, while the 24 bits are then clocked out in a tight loop using only local
+        names and integers, to keep the clock pulses short and to allocate nothing.
+        :return: the signed raw value or None if the amplifier is not ready
+        """
+        data_read = self.__dout.read
+        clock_write = self.__pd_sck.write
+
+        monotonic = self._clock.monotonic
+        deadline = monotonic() + HX711WeightFilamentSensor.READY_TIMEOUT
+        while data_read():
+            if self.__closed or monotonic() > deadline:
+                return None
+            self.__event.wait(HX711WeightFilamentSensor.READY_CHECK_TIME)
+
+        value = 0
+        for _ in self.__DATA_BITS:
+            clock_write(True)
+            clock_write(False)
+            value = (value << 1) | data_read()
+        # The extra pulses select the channel and the gain of the next conversion
+        for _ in self.__GAIN_BITS:
+            clock_write(True)
+            clock_write(False)
+
+        return value - 0x1000000 if value & 0x800000 else value
+
+    def __perform_sampling(self):
+        below_since = None
+        enough_since = None
+        streamed = None
+        streamed_at = None
+        started_at = self._clock.monotonic()
+        faulty = False
+        try:
+            while not self.__closed:
+                raw = self._read_raw()
+                now = self._clock.monotonic()
+                if raw is not None and raw not in HX711WeightFilamentSensor.INVALID_VALUES:
+                    self.__filter.feed(raw)
+                    self.__read_at = now
+
+                grams = self.get_weight()
+                if grams is None:
+                    # Without readings nothing can be decided, and a load cell that stays silent is a
+                    # fault of the sensor, not a run out: the check is suspended until it reads again
+                    below_since = None
+                    enough_since = None
+                    if self.get_state() == GenericFilamentSensorManager.State.MISSING:
+                        self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                    if not faulty and now - (self.__read_at or started_at) >= HX711WeightFilamentSensor.NO_READING_TIME:
+                        faulty = True
+                        streamed = streamed_at = None
+                        self._log_error("The load cell is not producing readings, the run out check is suspended")
+                        self.__reading_f(None)
+                elif self.is_waiting_reinsertion():
+                    below_since = None
+                    if not self.__is_enough(grams):
+                        enough_since = None
+                    elif enough_since is None:
+                        enough_since = now
+                        self._log("Spool weight over the threshold, waiting for it to be stable")
+                    elif now - enough_since >= self.__reinsert_time:
+                        enough_since = None
+                        self._set_state(GenericFilamentSensorManager.State.REINSERTED)
+                        self._reinsert()
+                        if self.__checking:
+                            self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                elif not self.__checking or self.__is_enough(grams):
+                    enough_since = None
+                    if below_since is not None and self.__checking:
+                        self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                    below_since = None
+                elif below_since is None:
+                    enough_since = None
+                    below_since = now
+                    self._set_state(GenericFilamentSensorManager.State.MISSING)
+                    self._log("Spool weight below the threshold")
+                elif now - below_since >= self.__runout_time:
+                    self._log("Run out time passed, printer paused")
+                    below_since = None
+                    # The state has to change before the run out, which pauses the print
+                    self._set_state(GenericFilamentSensorManager.State.RUN_OUT)
+                    self._runout()
+                    if not self._is_reinsertion_watched():
+                        self.stop_checking()
+
+                if grams is not None and faulty:
+                    faulty = False
+                    self._log("The load cell is producing readings again")
+                if (grams is not None
+                        and (streamed is None or abs(grams - streamed) >= HX711WeightFilamentSensor.MIN_STREAM_DELTA)
+                        and (streamed_at is None or now - streamed_at >= self.__stream_time)):
+                    streamed = grams
+                    streamed_at = now
+                    self.__reading_f(round(grams, 1))
+
+                self.__event.wait(HX711WeightFilamentSensor.SAMPLE_TIME)
+        finally:
+            self.__stopped.set()
+
+    def __is_enough(self, grams: Optional[float]) -> bool:
+        return grams is not None and grams >= self.__threshold
+
+    def get_weight(self) -> Optional[float]:
+        """
+        :return: the remaining filament in grams or None if the load cell has no recent reading
+        """
+        raw = self.__get_raw()
+        if raw is None:
+            return None
+        return (raw - self.__tare) / self.__scale - self.__spool_mass
+
+    def tare(self) -> int:
+        """
+        This method sets the current reading as the empty spool holder one.
+        :return: the new tare raw value, to be stored in the settings
+        """
+        raw = self.__get_raw()
+        if raw is None:
+            raise ValueError("No reading available from the load cell")
+        self.__tare = round(raw)
+        self._log(f"Load cell tared at {self.__tare}")
+        return self.__tare
+
+    def calibrate(self, mass: float) -> float:
+        """
+        This method computes the scale from a known mass placed on the tared spool holder.
+        :param mass: the reference mass in grams
+        :return: the new scale, to be stored in the settings
+        """
+        if mass <= 0:
+            raise ValueError("The reference mass must be positive")
+        raw = self.__get_raw()
+        if raw is None:
+            raise ValueError("No reading available from the load cell")
+        scale = (raw - self.__tare) / mass
+        if scale == 0:
+            raise ValueError("The load cell does not detect the reference mass")
+        self.__scale = scale
+        self._log(f"Load cell calibrated with scale {self.__scale}")
+        return self.__scale
+
+    def __get_raw(self) -> Optional[float]:
+        """
+        :return: the filtered raw value or None if the load cell has not been read recently
+        """
+        read_at = self.__read_at
+        if read_at is None or self._clock.monotonic() - read_at >= HX711WeightFilamentSensor.NO_READING_TIME:
+            return None
+        return self.__filter.value
+
+    def start_checking(self):
+        if self.__checking:
+            if self.is_waiting_reinsertion():
+                # The sampling goes back to the run out check at its next reading
+                self._set_state(GenericFilamentSensorManager.State.MONITORING)
+                self._log("Filament Sensor via load cell no more waiting for the reinsertion")
+            return
+        self.__checking = True
+        self._set_state(GenericFilamentSensorManager.State.MONITORING)
+        self._log("Filament Sensor via load cell started")
+
+    def stop_checking(self):
+        if not self.__checking:
+            return
+        self.__checking = False
+        self._set_state(GenericFilamentSensorManager.State.STOPPED)
+        self._log("Filament Sensor via load cell stopped")
+
+    def is_currently_available(self):
+        return self.__is_enough(self.get_weight())
+
+    def get_details(self) -> dict:
+        grams = self.get_weight()
+        return {"weight": None if grams is None else round(grams, 1)}
+
+    def close(self):
+        self.stop_checking()
+        self.__closed = True
+        self.__event.set()
+        self.__stopped.wait(HX711WeightFilamentSensor.READY_TIMEOUT + HX711WeightFilamentSensor.SAMPLE_TIME)
+        self._close_sensor()
+        self._close_pool()
+        self._log("Closed load cell")
+
+    def _close_sensor(self):
+        self.__dout.close()
+        self.__pd_sck.close()
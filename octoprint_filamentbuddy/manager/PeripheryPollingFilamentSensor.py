@@ -16,12 +16,19 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from periphery import GPIO
 
 from .AbstractPollingFilamentSensorManager import AbstractPollingFilamentSensorManager
+from .Clock import Clock
+from .PresenceFilter import PresenceFilter
 from .support import GPIONotFoundException
 
 
 class PeripheryPollingFilamentSensor(AbstractPollingFilamentSensorManager):
-    def __init__(self, logger, runout_f, pin: int, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool):
-        super().__init__(logger, runout_f, polling_time, runout_time, empty_v, invert_pull)
+    def __init__(self, logger, runout_f, pin: int, polling_time: int, runout_time: int, empty_v: str, invert_pull: bool,
+                 reinsert_f=None, reinsert_time: float = 0, clock: Clock = None,
+                 presence_filter: PresenceFilter = None):
+        super().__init__(
+            logger, runout_f, polling_time, runout_time, empty_v, invert_pull, reinsert_f, reinsert_time, clock,
+            presence_filter
+        )
         try:
             self.__input_device = GPIO(
                 "/dev/gpiochip0",
@@ -0,0 +1,147 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from math import ceil
+
+from .Clock import Clock
+
+
+class PresenceFilter:
+    """
+    This class decides whether the filament is present from a noisy binary sensor. Every
+    update reads a burst of samples and votes on them: the filament is declared missing
+    when at least missing_votes of the last window samples miss it, and present again
+    when at least return_votes see it, so with more votes needed to return there is a
+    hysteresis band where nothing changes. A new state is accepted only if the votes keep
+    supporting it for the stable time. Between two samples the thread waits, so a burst
+    costs at most a bounded number of reads, whatever the sensor does.
+    The default values read the sensor once, as it was before this filter.
+    """
+
+    MIN_SAMPLE_TIME = 0.001  # s
+
+    def __init__(self, window: int = 1, missing_votes: int = 1, return_votes: int = 1,
+                 stable_time: float = 0, sample_time: float = MIN_SAMPLE_TIME, clock: Clock = None):
+        """
+        :param window: the number of the last samples that vote
+        :param missing_votes: the samples without filament needed to declare it missing
+        :param return_votes: the samples with filament needed to declare it present again
+        :param stable_time: the time in seconds the votes have to support a new state to accept it
+        :param sample_time: the time in seconds between two samples
+        :param clock: the source of time, the system one if None
+        """
+        if window < 1:
+            raise ValueError("The filter window must contain at least one sample")
+        if not 1 <= missing_votes <= window or not 1 <= return_votes <= window:
+            raise ValueError("The filter votes must be between one and the window size")
+        if stable_time < 0:
+            raise ValueError("The filter stable time cannot be negative")
+
+        self.__clock = Clock() if clock is None else clock
+        self.__missing_votes = missing_votes
+        self.__return_votes = return_votes
+        self.__stable_time = stable_time
+        self.__sample_time = max(sample_time, PresenceFilter.MIN_SAMPLE_TIME)
+        self.__samples = [True] * window
+        # One sample more than needed, since the stable time starts from the first supporting sample
+        self.__max_burst = window + ceil(stable_time / self.__sample_time) + 1
+        self.__present = True
+        self.__statistics = PresenceFilter.__new_statistics()
+
+    def reset(self, present: bool = True) -> None:
+        """
+        This method sets the filtered state without reading the sensor, as when the sensing starts.
+        :param present: the new filtered state
+        """
+        self.__present = present
+
+    def update(self, read_f, wait_f) -> bool:
+        """
+        This method reads a burst of samples and returns the filtered state. The burst lasts
+        the window, and continues while a new state is waiting to become stable.
+        :param read_f: the function reading the raw sensor, true if the filament is present
+        :param wait_f: the function waiting the given seconds, it returns true to interrupt the burst
+        :return: true if the filament is present
+        """
+        samples = self.__samples
+        window = len(samples)
+        statistics = self.__statistics
+        candidate_since = None
+        count = 0
+
+        statistics["bursts"] += 1
+        while True:
+            sample = bool(read_f())
+            samples[count % window] = sample
+            count += 1
+            statistics["samples"] += 1
+            if sample != self.__present:
+                statistics["disagreeing"] += 1
+
+            if count >= window:
+                if self.__is_voted_change():
+                    if candidate_since is None:
+                        candidate_since = self.__clock.monotonic()
+                    if self.__clock.monotonic() - candidate_since >= self.__stable_time:
+                        self.__present = not self.__present
+                        statistics["returned" if self.__present else "missing"] += 1
+                        break
+                elif candidate_since is not None:
+                    statistics["rejected"] += 1
+                    break
+                else:
+                    break
+
+            if count >= self.__max_burst:
+                statistics["truncated"] += 1
+                break
+            if wait_f(self.__sample_time):
+                break
+
+        statistics["max_burst"] = max(statistics["max_burst"], count)
+        return self.__present
+
+    def __is_voted_change(self) -> bool:
+        if self.__present:
+            return self.__samples.count(False) >= self.__missing_votes
+        return self.__samples.count(True) >= self.__return_votes
+
+    @property
+    def present(self) -> bool:
+        """
+        :return: the last filtered state, without reading the sensor
+        """
+        return self.__present
+
+    def get_statistics(self) -> dict:
+        """
+        The statistics help to tune the filter: many disagreeing samples with few state
+        changes mean the filter is hiding noise, while many rejected changes mean the
+        stable time is the one deciding.
+        :return: a dictionary with the counters since the filter creation
+        """
+        return dict(self.__statistics)
+
+    @staticmethod
+    def __new_statistics() -> dict:
+        return {
+            "bursts": 0,
+            "samples": 0,
+            "disagreeing": 0,
+            "missing": 0,
+            "returned": 0,
+            "rejected": 0,
+            "truncated": 0,
+            "max_burst": 0
+        }
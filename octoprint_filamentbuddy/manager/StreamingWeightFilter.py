@@ -0,0 +1,89 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import Optional
+
+
+class StreamingWeightFilter:
+    """
+    This class smooths the raw load cell values one at a time. Each value goes first
+    through a small moving median, which discards the isolated spikes caused by a
+    corrupted bit-banged read, and then through an exponential moving average, which
+    removes the noise left. The buffers are allocated once, so feeding a value does
+    not allocate anything apart from the result.
+    """
+
+    def __init__(self, window: int = 5, alpha: float = 0.3):
+        """
+        :param window: the number of values considered by the median, it should be odd
+        :param alpha: the weight of the newest median in the moving average, in (0, 1]
+        """
+        if window < 1:
+            raise ValueError("The median window must contain at least one value")
+        if not 0 < alpha <= 1:
+            raise ValueError("The moving average weight must be in (0, 1]")
+        self.__alpha = alpha
+        self.__ring = [0] * window
+        self.__sorted = [0] * window
+        self.__next = 0
+        self.__size = 0
+        self.__value = None
+
+    def feed(self, raw: int) -> float:
+        """
+        This method adds a new raw value to the filter.
+        :param raw: the value read from the sensor
+        :return: the filtered value
+        """
+        ring = self.__ring
+        window = len(ring)
+        ring[self.__next] = raw
+        self.__next = (self.__next + 1) % window
+        if self.__size < window:
+            self.__size += 1
+
+        size = self.__size
+        ordered = self.__sorted
+        for i in range(size):
+            ordered[i] = ring[i]
+        # Insertion sort in place: with few values it is faster than sorted() and allocates nothing
+        for i in range(1, size):
+            current = ordered[i]
+            j = i - 1
+            while j >= 0 and ordered[j] > current:
+                ordered[j + 1] = ordered[j]
+                j -= 1
+            ordered[j + 1] = current
+        median = ordered[size // 2]
+
+        if self.__value is None:
+            self.__value = float(median)
+        else:
+            self.__value += self.__alpha * (median - self.__value)
+        return self.__value
+
+    def reset(self) -> None:
+        """
+        This method forgets all the values seen so far.
+        """
+        self.__next = 0
+        self.__size = 0
+        self.__value = None
+
+    @property
+    def value(self) -> Optional[float]:
+        """
+        :return: the last filtered value or None if nothing has been fed yet
+        """
+        return self.__value
@@ -14,15 +14,26 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from .support import is_gpio_available, GPIONotFoundException
+from .Clock import Clock, VirtualClock
+from .GenericFilamentSensorManager import GenericFilamentSensorManager
+from .PresenceFilter import PresenceFilter
 from .AbstractPollingFilamentSensorManager import AbstractPollingFilamentSensorManager
 from .PeripheryPollingFilamentSensor import PeripheryPollingFilamentSensor
 from .BlinkaPollingFilamentSensorManager import BlinkaPollingFilamentSensor
+from .StreamingWeightFilter import StreamingWeightFilter
+from .HX711WeightFilamentSensor import HX711WeightFilamentSensor
 
 
 __all__ = [
     "is_gpio_available",
     "GPIONotFoundException",
+    "Clock",
+    "VirtualClock",
+    "GenericFilamentSensorManager",
+    "PresenceFilter",
     "AbstractPollingFilamentSensorManager",
     "PeripheryPollingFilamentSensor",
-    "BlinkaPollingFilamentSensor"
+    "BlinkaPollingFilamentSensor",
+    "StreamingWeightFilter",
+    "HX711WeightFilamentSensor"
 ]
@@ -0,0 +1,329 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import logging
+import tempfile
+from copy import deepcopy
+from datetime import datetime
+from re import compile as regex
+from time import sleep
+from typing import Optional
+
+from octoprint.events import Events
+
+from .. import FilamentBuddyPlugin
+from ..manager import AbstractPollingFilamentSensorManager, VirtualClock
+
+
+class ReplayHarness:
+    """
+    This class runs the plugin on a VirtualClock against a recorded scenario: OctoPrint
+    events, temperature reports and filament sensor values, each with the time in seconds
+    from the scenario start. The printer, the settings and the plugin manager are replaced
+    by fakes that record what the plugin does, in particular the G-code it sends, so a
+    print of hours is replayed in seconds and its outcome can be checked exactly.
+    """
+
+    SERIAL_LINE = regex(r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - Recv: (.*)$")
+    # Not preceded by a letter, so the keys of reports like "EXTRUDER_COUNT:1" are not temperatures
+    TEMPERATURE = regex(r"(?<![A-Za-z_])(B|C|T\d*):\s*(-?\d+(?:\.\d+)?)(?:\s*/\s*(-?\d+(?:\.\d+)?))?")
+
+    def __init__(self, settings: Optional[dict] = None, speed: Optional[float] = None, start_time: float = 0.0,
+                 pause_time: float = 0.0):
+        """
+        :param settings: the plugin settings different from the default ones, as {"fs": {"en": True}}
+        :param speed: how many times faster than reality the scenario runs, None to run as fast as possible
+        :param start_time: the UNIX time of the scenario start, used for the journal and the notifications
+        :param pause_time: the seconds the printer takes to pause, as when it completes the queued moves
+        """
+        self.clock = VirtualClock(start_time)
+        self.pause_time = pause_time
+        self.printer = ReplayPrinter(self)
+        self.settings = ReplaySettings(settings or {})
+        self.messages = []
+        self.filament = True
+        self.__speed = speed
+        self.__entries = []
+        self.__data_folder = tempfile.TemporaryDirectory(prefix="filamentbuddy-replay-")
+
+        self.plugin = ReplayPlugin(self)
+        self.plugin._logger = logging.getLogger("octoprint.plugins.filamentbuddy.replay")
+        self.plugin._settings = self.settings
+        self.plugin._printer = self.printer
+        self.plugin._plugin_manager = ReplayPluginManager(self)
+        self.plugin._data_folder = self.__data_folder.name
+
+    def add_event(self, at: float, event: str, payload: Optional[dict] = None) -> "ReplayHarness":
+        """
+        :param at: the event time in seconds from the scenario start
+        :param event: an OctoPrint event name, as instance "PrintStarted"
+        """
+        self.__entries.append((at, "event", (event, payload or {})))
+        return self
+
+    def add_temperatures(self, at: float, temperatures: dict) -> "ReplayHarness":
+        """
+        :param temperatures: the parsed temperatures, as {"T0": (actual, target)}
+        """
+        self.__entries.append((at, "temperatures", temperatures))
+        return self
+
+    def add_filament(self, at: float, available: bool) -> "ReplayHarness":
+        """
+        :param available: the value the filament sensor reads from this time on
+        """
+        self.__entries.append((at, "filament", available))
+        return self
+
+    def load_scenario(self, path: str) -> "ReplayHarness":
+        """
+        This method adds the entries of a JSON lines file, where each line is one of:
+        {"t": 0, "event": "PrintStarted"}, {"t": 5, "serial": "ok T:210.0 /210.0"},
+        {"t": 5, "temperatures": {"T0": [210, 210]}} or {"t": 60, "filament": false}.
+        """
+        with open(path) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "event" in entry:
+                    self.add_event(entry["t"], entry["event"], entry.get("payload"))
+                elif "serial" in entry:
+                    self.add_serial_line(entry["t"], entry["serial"])
+                elif "temperatures" in entry:
+                    self.add_temperatures(entry["t"], {k: tuple(v) for k, v in entry["temperatures"].items()})
+                elif "filament" in entry:
+                    self.add_filament(entry["t"], bool(entry["filament"]))
+                else:
+                    raise ValueError(f"Unknown scenario entry: {line.strip()}")
+        return self
+
+    def load_serial_log(self, path: str, offset: float = 0.0) -> "ReplayHarness":
+        """
+        This method adds the temperature reports of an OctoPrint serial.log, timed from its first line.
+        :param offset: the scenario time corresponding to the first line of the log
+        """
+        first = None
+        with open(path, errors="replace") as file:
+            for line in file:
+                match = ReplayHarness.SERIAL_LINE.match(line.rstrip("\n"))
+                if match is None:
+                    continue
+                at = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+                first = at if first is None else first
+                self.add_serial_line(offset + at - first, match.group(2))
+        return self
+
+    def add_serial_line(self, at: float, line: str) -> "ReplayHarness":
+        """
+        This method adds a received serial line, if it is a temperature report.
+        """
+        temperatures = ReplayHarness.parse_temperatures(line)
+        if temperatures:
+            self.add_temperatures(at, temperatures)
+        return self
+
+    @staticmethod
+    def parse_temperatures(line: str) -> dict:
+        """
+        This method parses a temperature report like OctoPrint, so "T" becomes "T0".
+        :return: the temperatures as {"T0": (actual, target)}, empty if the line is not a report
+        """
+        result = {}
+        for name, actual, target in ReplayHarness.TEMPERATURE.findall(line):
+            result[name] = (float(actual), None if target == "" else float(target))
+        if "T" in result:
+            result.setdefault("T0", result["T"])
+            del result["T"]
+        return result
+
+    def run(self, until: Optional[float] = None) -> "ReplayHarness":
+        """
+        This method replays all the entries in time order, then lets the clock run until the given time.
+        :param until: the final time in seconds, by default the last entry one
+        """
+        self.plugin.on_after_startup()
+        try:
+            for at, kind, value in sorted(self.__entries, key=lambda entry: entry[0]):
+                self.__advance_to(at)
+                if kind == "event":
+                    self.fire(*value)
+                elif kind == "temperatures":
+                    self.plugin.on_temperature_received(None, dict(value))
+                else:
+                    self.filament = value
+                self.clock.settle()
+            if until is not None:
+                self.__advance_to(until)
+        finally:
+            self.plugin.on_shutdown()
+            self.__data_folder.cleanup()
+        return self
+
+    def fire(self, event: str, payload: Optional[dict] = None) -> None:
+        """
+        This method delivers an OctoPrint event to the plugin, updating the printer state first.
+        """
+        self.printer.on_event(event)
+        self.plugin.on_event(event, payload or {})
+
+    def gcode(self) -> list:
+        """
+        :return: the G-code commands sent by the plugin, in order
+        """
+        return [command for _, command in self.printer.sent]
+
+    def timed_gcode(self) -> list:
+        """
+        :return: the G-code commands sent by the plugin with their scenario time
+        """
+        return list(self.printer.sent)
+
+    def __advance_to(self, at: float):
+        if self.__speed is not None and at > self.clock.monotonic():
+            sleep((at - self.clock.monotonic()) / self.__speed)
+        self.clock.advance_to(at)
+
+
+class ReplayPlugin(FilamentBuddyPlugin):
+    """
+    The plugin with the GPIO always available and a sensor reading the harness trace.
+    """
+
+    def __init__(self, harness: ReplayHarness):
+        super().__init__(harness.clock)
+        self.__harness = harness
+
+    def _is_gpio_available(self) -> bool:
+        return True
+
+    def _create_filament_sensor(self, mode: str, runout_f, reinsert_f, reinsert_time: float):
+        fs = self._settings.get(["fs"])
+        return ReplaySensor(
+            self.__harness,
+            self._logger,
+            runout_f,
+            int(fs["polling_time"]),
+            int(fs["run_out_time"]),
+            str(fs["empty_voltage"]),
+            bool(fs["invert_pull"]),
+            reinsert_f,
+            reinsert_time,
+            self._clock,
+            self._create_presence_filter()
+        )
+
+    def get_plugin_data_folder(self):
+        return self._data_folder
+
+
+class ReplaySensor(AbstractPollingFilamentSensorManager):
+    def __init__(self, harness: ReplayHarness, *args):
+        super().__init__(*args)
+        self.__harness = harness
+
+    def is_currently_available(self):
+        return self.__harness.filament
+
+    def _close_sensor(self):
+        pass
+
+
+class ReplayPrinter:
+    """
+    This is a fake of OctoPrint printer, for the methods used by the plugin. The pause and
+    resume requests are answered with the corresponding events, like OctoPrint does.
+    """
+
+    def __init__(self, harness: ReplayHarness):
+        self.__harness = harness
+        self.state = "operational"
+        self.sent = []
+
+    def on_event(self, event: str):
+        if event in (Events.PRINT_STARTED, Events.PRINT_RESUMED):
+            self.state = "printing"
+        elif Events.PRINT_PAUSED == event:
+            self.state = "paused"
+        elif event in (Events.PRINT_DONE, Events.PRINT_FAILED, Events.PRINT_CANCELLED):
+            self.state = "operational"
+
+    def commands(self, commands, *args, **kwargs):
+        if isinstance(commands, str):
+            commands = [commands]
+        now = self.__harness.clock.monotonic()
+        self.sent.extend((now, command) for command in commands)
+
+    def pause_print(self, *args, **kwargs):
+        if self.state == "printing":
+            self.state = "pausing"
+            self.__harness.clock.schedule(self.__harness.pause_time, lambda: self.__harness.fire(Events.PRINT_PAUSED))
+
+    def resume_print(self, *args, **kwargs):
+        if self.state == "paused":
+            self.state = "resuming"
+            self.__harness.clock.schedule(0, lambda: self.__harness.fire(Events.PRINT_RESUMED))
+
+    def is_printing(self):
+        return self.state == "printing"
+
+    def is_pausing(self):
+        return self.state == "pausing"
+
+    def is_paused(self):
+        return self.state == "paused"
+
+    def get_current_job(self):
+        return {"file": {"name": "replay.gcode"}}
+
+    def get_current_data(self):
+        return {"progress": {"completion": None}}
+
+
+class ReplaySettings:
+    """
+    This is a fake of the plugin settings, with the default values overridden by the given ones.
+    """
+
+    def __init__(self, overrides: dict):
+        self.__values = deepcopy(FilamentBuddyPlugin.DEFAULT_SETTINGS)
+        for section, values in overrides.items():
+            if isinstance(values, dict):
+                self.__values[section].update(values)
+            else:
+                self.__values[section] = values
+
+    def get(self, path: list):
+        value = self.__values
+        for key in path:
+            value = value[key]
+        return deepcopy(value)
+
+    def set(self, path: list, value):
+        target = self.__values
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = value
+
+    def save(self):
+        pass
+
+
+class ReplayPluginManager:
+    def __init__(self, harness: ReplayHarness):
+        self.__harness = harness
+
+    def send_plugin_message(self, plugin: str, data: dict):
+        self.__harness.messages.append((self.__harness.clock.monotonic(), data))
@@ -0,0 +1,52 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+from argparse import ArgumentParser
+
+from .ReplayHarness import ReplayHarness
+
+
+def main():
+    parser = ArgumentParser(
+        prog="python -m octoprint_filamentbuddy.replay",
+        description="Replay a print scenario on FilamentBuddy and print the G-code it sends."
+    )
+    parser.add_argument("scenario", nargs="*", help="JSON lines files with events, temperatures and sensor values")
+    parser.add_argument("--serial-log", action="append", default=[], help="an OctoPrint serial.log to replay")
+    parser.add_argument("--settings", help="a JSON file with the settings different from the default ones")
+    parser.add_argument("--speed", type=float, help="the speed-up over real time, as fast as possible if omitted")
+    parser.add_argument("--until", type=float, help="the scenario time in seconds at which to stop")
+    args = parser.parse_args()
+
+    settings = None
+    if args.settings:
+        with open(args.settings) as file:
+            settings = json.load(file)
+
+    harness = ReplayHarness(settings, args.speed)
+    for path in args.scenario:
+        harness.load_scenario(path)
+    for path in args.serial_log:
+        harness.load_serial_log(path)
+    harness.run(args.until)
+
+    for at, command in harness.timed_gcode():
+        hours, rest = divmod(at, 3600)
+        minutes, seconds = divmod(rest, 60)
+        print(f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}  {command}")
+
+
+if __name__ == "__main__":
+    main()
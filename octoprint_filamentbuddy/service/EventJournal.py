@@ -0,0 +1,276 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+from bisect import bisect_left
+from collections import Counter
+from queue import Queue, Full, Empty
+from re import fullmatch
+from threading import Lock, Thread
+from typing import Optional
+
+from ..manager import Clock
+
+
+class EventJournal:
+    """
+    This class keeps an append-only journal of the plugin events in its data folder, one
+    JSON record per line. The records are written by a background thread, so recording an
+    event never waits for the disk, and the journal is split in segments of limited size,
+    deleting the oldest ones. For every segment, an index in memory keeps its time range,
+    the number of records per type and the file offset of one record every INDEX_STEP,
+    so a query reads only the segments and the parts of them that can match.
+    """
+
+    MAX_SEGMENT_SIZE = 1024 * 1024  # B
+    MAX_SEGMENTS = 5
+    QUEUE_SIZE = 1000
+    INDEX_STEP = 64  # records
+    SEGMENT_NAME = "journal-{:06d}.jsonl"
+    SEGMENT_PATTERN = r"journal-(\d{6})\.jsonl"
+
+    def __init__(self, logger, folder: str, max_segment_size: int = MAX_SEGMENT_SIZE,
+                 max_segments: int = MAX_SEGMENTS, clock: Clock = None):
+        """
+        :param logger: an instance of OctoPrint logger
+        :param folder: the folder containing the journal segments
+        :param clock: the source of the records time, the system one if None
+        """
+        self.__clock = Clock() if clock is None else clock
+        self.__logger = logger
+        self.__folder = folder
+        self.__max_segment_size = max_segment_size
+        self.__max_segments = max_segments
+        self.__queue = Queue(maxsize=EventJournal.QUEUE_SIZE)
+        self.__lock = Lock()
+        self.__segments = []
+        self.__dropped = 0
+        self.__thread = None
+
+    def start(self) -> None:
+        """
+        This method starts the writer thread, which indexes the existing segments before
+        writing, so the caller does not wait for the disk. Until the indexing completes,
+        the queries see only the records of the segments already indexed.
+        """
+        self.__thread = Thread(target=self.__write_loop, name="FilamentBuddyJournal", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        This method writes the queued records and stops the writer thread.
+        """
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+    def record(self, event_type: str, **data) -> None:
+        """
+        This method queues a record without blocking. If the writer cannot keep up, the
+        record is dropped and counted, instead of slowing down the caller.
+        :param event_type: the event category, as instance "run_out"
+        :param data: the event details, which must be serializable as JSON
+        """
+        try:
+            self.__queue.put_nowait({"time": self.__clock.time(), "type": event_type, **data})
+        except Full:
+            self.__dropped += 1
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, types: Optional[list] = None,
+              limit: Optional[int] = None) -> list:
+        """
+        This method returns the records in a time range, from the oldest to the newest.
+        :param start: the minimum UNIX time, None for no limit
+        :param end: the maximum UNIX time, None for no limit
+        :param types: the event types to return, None for all of them
+        :param limit: the maximum number of records, the newest ones are kept
+        :return: the list of records
+        """
+        types = None if types is None else set(types)
+        records = []
+        for segment in self.__matching_segments(start, end, types):
+            offset = 0
+            if start is not None:
+                position = bisect_left(segment["index_times"], start)
+                offset = segment["index_offsets"][max(position - 1, 0)]
+            try:
+                with open(segment["path"], "rb") as file:
+                    file.seek(offset)
+                    for line in file:
+                        record = EventJournal.__parse(line)
+                        if record is None or (start is not None and record["time"] < start):
+                            continue
+                        if end is not None and record["time"] > end:
+                            break
+                        if types is None or record["type"] in types:
+                            records.append(record)
+            except OSError:
+                # The segment has been deleted by a rotation in the meantime
+                continue
+        return records if limit is None else records[-limit:] if limit > 0 else []
+
+    def stats(self, start: Optional[float] = None, end: Optional[float] = None) -> dict:
+        """
+        :return: the number of records per event type in a time range
+        """
+        if start is None and end is None:
+            with self.__lock:
+                counts = sum((segment["counts"] for segment in self.__segments), Counter())
+            return dict(counts)
+        return dict(Counter(record["type"] for record in self.query(start, end)))
+
+    def get_dropped(self) -> int:
+        """
+        :return: the number of records dropped since the writer was too slow
+        """
+        return self.__dropped
+
+    def __matching_segments(self, start, end, types) -> list:
+        with self.__lock:
+            segments = [dict(segment) for segment in self.__segments]
+        return [
+            segment for segment in segments
+            if segment["records"] > 0
+            and (start is None or segment["end"] >= start)
+            and (end is None or segment["start"] <= end)
+            and (types is None or not types.isdisjoint(segment["counts"]))
+        ]
+
+    def __write_loop(self):
+        self.__load_segments()
+        running = True
+        while running:
+            batch = [self.__queue.get()]
+            # Everything already queued is written at once, with a single flush
+            try:
+                while len(batch) < EventJournal.QUEUE_SIZE:
+                    batch.append(self.__queue.get_nowait())
+            except Empty:
+                pass
+            if None in batch:
+                batch = [record for record in batch if record is not None]
+                running = False
+            try:
+                self.__write(batch)
+            except OSError as e:
+                self.__logger.info(f"Impossible to write the journal: {e}")
+
+    def __write(self, batch: list):
+        if not batch:
+            return
+        with self.__lock:
+            if not self.__segments or self.__segments[-1]["size"] >= self.__max_segment_size:
+                self.__rotate()
+            segment = self.__segments[-1]
+
+        lines = []
+        updates = []
+        offset = segment["size"]
+        for record in batch:
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+            lines.append(line)
+            updates.append((record, offset))
+            offset += len(line)
+
+        with open(segment["path"], "ab") as file:
+            file.write(b"".join(lines))
+            file.flush()
+
+        with self.__lock:
+            for record, record_offset in updates:
+                EventJournal.__add_to_index(segment, record, record_offset)
+            segment["size"] = offset
+
+    def __rotate(self):
+        number = self.__segments[-1]["number"] + 1 if self.__segments else 1
+        self.__segments.append(EventJournal.__new_segment(number, self.__path(number)))
+        while len(self.__segments) > self.__max_segments:
+            oldest = self.__segments.pop(0)
+            try:
+                os.remove(oldest["path"])
+            except OSError:
+                pass
+
+    def __load_segments(self):
+        try:
+            os.makedirs(self.__folder, exist_ok=True)
+            names = os.listdir(self.__folder)
+        except OSError as e:
+            self.__logger.error(f"Impossible to open the journal folder: {e}")
+            return
+        numbers = sorted(
+            int(match.group(1))
+            for match in (fullmatch(EventJournal.SEGMENT_PATTERN, name) for name in names)
+            if match is not None
+        )
+        for number in numbers:
+            try:
+                segment = self.__index_segment(number)
+            except OSError as e:
+                self.__logger.error(f"Impossible to index the journal segment {number}: {e}")
+                continue
+            with self.__lock:
+                self.__segments.append(segment)
+
+    def __index_segment(self, number: int) -> dict:
+        segment = EventJournal.__new_segment(number, self.__path(number))
+        offset = 0
+        with open(segment["path"], "rb") as file:
+            for line in file:
+                record = EventJournal.__parse(line)
+                if record is not None:
+                    EventJournal.__add_to_index(segment, record, offset)
+                offset += len(line)
+        segment["size"] = offset
+        return segment
+
+    def __path(self, number: int) -> str:
+        return os.path.join(self.__folder, EventJournal.SEGMENT_NAME.format(number))
+
+    @staticmethod
+    def __new_segment(number: int, path: str) -> dict:
+        return {
+            "number": number,
+            "path": path,
+            "size": 0,
+            "records": 0,
+            "start": None,
+            "end": None,
+            "counts": Counter(),
+            "index_times": [],
+            "index_offsets": []
+        }
+
+    @staticmethod
+    def __add_to_index(segment: dict, record: dict, offset: int):
+        if segment["records"] % EventJournal.INDEX_STEP == 0:
+            segment["index_times"].append(record["time"])
+            segment["index_offsets"].append(offset)
+        segment["records"] += 1
+        segment["counts"][record["type"]] += 1
+        if segment["start"] is None:
+            segment["start"] = record["time"]
+        segment["end"] = record["time"]
+
+    @staticmethod
+    def __parse(line: bytes) -> Optional[dict]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # A truncated line, as instance after a power loss
+            return None
+        return record if isinstance(record, dict) and "time" in record and "type" in record else None
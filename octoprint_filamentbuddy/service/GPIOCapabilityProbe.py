@@ -0,0 +1,252 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import struct
+from concurrent.futures.thread import ThreadPoolExecutor
+from glob import glob
+from threading import Lock
+from typing import Optional
+
+from ..manager import Clock, is_gpio_available
+
+try:
+    from fcntl import ioctl
+except ImportError:
+    ioctl = None
+
+
+class GPIOCapabilityProbe:
+    """
+    This class discovers once what the GPIO of the board can do: the character device
+    chips, their lines with the ones already in use, and which line features the kernel
+    supports. The probe runs in its own thread, so the plugin startup does not wait for
+    it, and its report is cached, also on disk, together with a signature of the device
+    set. The devices are probed again only when this signature changes.
+    """
+
+    CHIP_PATTERN = "/dev/gpiochip*"
+    SYSFS_PATH = "/sys/class/gpio"
+
+    # Linux GPIO character device ABI v1, see include/uapi/linux/gpio.h
+    GPIO_GET_CHIPINFO_IOCTL = 0x8044B401
+    GPIO_GET_LINEINFO_IOCTL = 0xC048B402
+    CHIP_INFO = struct.Struct("32s32sI")
+    LINE_INFO = struct.Struct("II32s32s")
+    GPIOLINE_FLAG_KERNEL = 1 << 0
+
+    # The first kernel versions supporting a line feature on the character device
+    EDGE_KERNEL = (4, 8)
+    BIAS_KERNEL = (5, 5)
+    DEBOUNCE_KERNEL = (5, 10)
+
+    def __init__(self, logger, clock: Clock = None):
+        """
+        :param logger: an instance of OctoPrint logger
+        :param clock: the source of the report time, the system one if None
+        """
+        self.__clock = Clock() if clock is None else clock
+        self.__logger = logger
+        self.__pool = ThreadPoolExecutor(max_workers=1)
+        self.__lock = Lock()
+        self.__cache_file = None
+        self.__report = None
+        self.__probing = False
+
+    def start(self, cache_file: Optional[str] = None, on_ready=None) -> None:
+        """
+        This method starts the first probe in background, reusing the cached report if the
+        device set has not changed since it was written.
+        :param cache_file: the JSON file where the report is kept between restarts, None to keep it only in memory
+        :param on_ready: the action to run, in the probe thread, when the first report is available
+        """
+        self.__cache_file = cache_file
+        self.__submit(on_ready, use_cache_file=True)
+
+    def stop(self) -> None:
+        self.__pool.shutdown(wait=False)
+
+    def get_capabilities(self) -> Optional[dict]:
+        """
+        This method returns the cached report. Before returning it, the device set is
+        checked, which costs just a directory listing, and a new probe is started if it changed.
+        :return: the report or None if the probe has not completed yet
+        """
+        with self.__lock:
+            report = self.__report
+        if report is None:
+            return None
+        if report["signature"] != GPIOCapabilityProbe.__get_signature():
+            self.__logger.info("GPIO device set changed, probing again")
+            with self.__lock:
+                self.__report = None
+            self.__submit(None, use_cache_file=False)
+            return None
+        return report
+
+    def is_gpio_available(self) -> bool:
+        """
+        Until the first report is available, this method falls back to checking whether a
+        GPIO device exists, which does not open anything.
+        :return: true if the board exposes a GPIO
+        """
+        with self.__lock:
+            report = self.__report
+        return is_gpio_available() if report is None else report["available"]
+
+    def __submit(self, on_ready, use_cache_file: bool) -> None:
+        with self.__lock:
+            if self.__probing:
+                return
+            self.__probing = True
+        self.__pool.submit(self.__clock.track(lambda: self.__probe(on_ready, use_cache_file)))
+
+    def __probe(self, on_ready, use_cache_file: bool) -> None:
+        try:
+            signature = GPIOCapabilityProbe.__get_signature()
+            report = self.__read_cache_file(signature) if use_cache_file else None
+            if report is None:
+                report = self.__discover(signature)
+                self.__write_cache_file(report)
+            with self.__lock:
+                self.__report = report
+            self.__logger.info(
+                f"GPIO capabilities: {len(report['chips'])} chips, bias {report['bias']}, "
+                f"edge {report['edge']}, debounce {report['debounce']}"
+            )
+        except Exception as e:
+            self.__logger.error(f"GPIO probe failed: {e}")
+        finally:
+            with self.__lock:
+                self.__probing = False
+
+        if on_ready is None:
+            return
+        # Nobody reads the result of this thread, so an error here would be lost
+        try:
+            on_ready()
+        except Exception:
+            self.__logger.exception("Error after the GPIO probe")
+
+    def __discover(self, signature: list) -> dict:
+        chips = []
+        for path in GPIOCapabilityProbe.__get_chip_paths():
+            chip = self.__probe_chip(path)
+            if chip is not None:
+                chips.append(chip)
+
+        sysfs = os.path.isdir(GPIOCapabilityProbe.SYSFS_PATH)
+        kernel = GPIOCapabilityProbe.__get_kernel_version()
+        chardev = len(chips) > 0
+        return {
+            "signature": signature,
+            "time": self.__clock.time(),
+            "available": chardev or is_gpio_available(),
+            "kernel": ".".join(str(n) for n in kernel),
+            "sysfs": sysfs,
+            "edge": chardev and kernel >= GPIOCapabilityProbe.EDGE_KERNEL,
+            "bias": chardev and kernel >= GPIOCapabilityProbe.BIAS_KERNEL,
+            "debounce": chardev and kernel >= GPIOCapabilityProbe.DEBOUNCE_KERNEL,
+            "chips": chips
+        }
+
+    def __probe_chip(self, path: str) -> Optional[dict]:
+        if ioctl is None:
+            return None
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError as e:
+            self.__logger.info(f"Impossible to open {path}: {e}")
+            return None
+
+        try:
+            buffer = bytearray(GPIOCapabilityProbe.CHIP_INFO.size)
+            ioctl(fd, GPIOCapabilityProbe.GPIO_GET_CHIPINFO_IOCTL, buffer, True)
+            name, label, count = GPIOCapabilityProbe.CHIP_INFO.unpack(buffer)
+
+            lines = []
+            buffer = bytearray(GPIOCapabilityProbe.LINE_INFO.size)
+            for offset in range(count):
+                GPIOCapabilityProbe.LINE_INFO.pack_into(buffer, 0, offset, 0, b"", b"")
+                ioctl(fd, GPIOCapabilityProbe.GPIO_GET_LINEINFO_IOCTL, buffer, True)
+                _, flags, line_name, consumer = GPIOCapabilityProbe.LINE_INFO.unpack(buffer)
+                lines.append({
+                    "offset": offset,
+                    "name": GPIOCapabilityProbe.__decode(line_name),
+                    "consumer": GPIOCapabilityProbe.__decode(consumer),
+                    "used": bool(flags & GPIOCapabilityProbe.GPIOLINE_FLAG_KERNEL)
+                })
+
+            return {
+                "path": path,
+                "name": GPIOCapabilityProbe.__decode(name),
+                "label": GPIOCapabilityProbe.__decode(label),
+                "lines": lines
+            }
+        except OSError as e:
+            self.__logger.info(f"Impossible to read the {path} information: {e}")
+            return None
+        finally:
+            os.close(fd)
+
+    def __read_cache_file(self, signature: list) -> Optional[dict]:
+        if self.__cache_file is None:
+            return None
+        try:
+            with open(self.__cache_file, "r") as file:
+                report = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return report if report.get("signature") == signature else None
+
+    def __write_cache_file(self, report: dict) -> None:
+        if self.__cache_file is None:
+            return
+        try:
+            with open(self.__cache_file, "w") as file:
+                json.dump(report, file)
+        except OSError as e:
+            self.__logger.info(f"Impossible to cache the GPIO capabilities: {e}")
+
+    @staticmethod
+    def __get_chip_paths() -> list:
+        return sorted(glob(GPIOCapabilityProbe.CHIP_PATTERN), key=lambda path: (len(path), path))
+
+    @staticmethod
+    def __get_signature() -> list:
+        """
+        The signature identifies the device set: the chips with their device numbers and
+        the kernel, which defines the supported features. It is a list to be equal after JSON.
+        """
+        signature = [os.uname().release]
+        for path in GPIOCapabilityProbe.__get_chip_paths():
+            try:
+                signature.append([path, os.stat(path).st_rdev])
+            except OSError:
+                pass
+        return signature
+
+    @staticmethod
+    def __get_kernel_version() -> tuple:
+        numbers = []
+        for part in os.uname().release.split("-")[0].split("."):
+            if not part.isdigit():
+                break
+            numbers.append(int(part))
+        return tuple(numbers)
+
+    @staticmethod
+    def __decode(raw: bytes) -> str:
+        return raw.split(b"\0", 1)[0].decode("utf-8", "replace")
@@ -0,0 +1,190 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+from threading import Lock, Thread
+
+from ..manager import Clock
+
+
+class MQTTTelemetry:
+    """
+    This class publishes the plugin state on a MQTT broker as retained topics, so every
+    subscriber immediately receives the last value. A value is published only when it
+    changes and the changes are coalesced for a short window: if a value flickers in the
+    meantime, only the final one is sent, and nothing at all if it is back to the published
+    one. Optionally, it also publishes the Home Assistant discovery configurations.
+    """
+
+    COALESCE_TIME = 0.5  # s
+    KEEPALIVE = 60  # s
+
+    # Name, component and Home Assistant specific configuration of every published value
+    ENTITIES = {
+        "filament": ("binary_sensor", {"name": "Filament", "payload_on": "ON", "payload_off": "OFF"}),
+        "sensor_state": ("sensor", {"name": "Sensor state", "icon": "mdi:printer-3d-nozzle-alert"}),
+        "fr_state": ("sensor", {"name": "Filament remover state", "icon": "mdi:printer-3d-nozzle"}),
+        "fr_last_action": ("sensor", {"name": "Filament remover last action", "icon": "mdi:printer-3d-nozzle"}),
+        "pause_reason": ("sensor", {"name": "Pause reason", "icon": "mdi:pause-circle"}),
+        "last_run_out": ("sensor", {"name": "Last run out", "device_class": "timestamp"}),
+        "spool_weight": ("sensor", {"name": "Spool remaining filament", "device_class": "weight",
+                                    "unit_of_measurement": "g", "state_class": "measurement"})
+    }
+
+    def __init__(self, logger, client_factory, address: str, port: int, base_topic: str, node_id: str,
+                 username: str = None, password: str = None, discovery_prefix: str = None,
+                 coalesce_time: float = COALESCE_TIME, clock: Clock = None):
+        """
+        :param logger: an instance of OctoPrint logger
+        :param client_factory: the function that creates a paho MQTT client from its client ID
+        :param base_topic: the topic under which all the values are published
+        :param node_id: the unique identifier of this printer
+        :param discovery_prefix: the Home Assistant discovery prefix, None to disable the discovery
+        :param clock: the source of time for the coalescing window, the system one if None
+        """
+        self.__clock = Clock() if clock is None else clock
+        self.__logger = logger
+        self.__address = address
+        self.__port = port
+        self.__base_topic = base_topic.strip("/")
+        self.__node_id = node_id
+        self.__discovery_prefix = discovery_prefix
+        self.__coalesce_time = coalesce_time
+        self.__lock = Lock()
+        self.__published = {}
+        self.__pending = {}
+        self.__pending_event = self.__clock.event()
+        self.__stop_event = self.__clock.event()
+        self.__thread = None
+        self.__stopped = False
+
+        # A different client ID from the run out message one, otherwise the broker would drop this connection
+        self.__client = client_factory(f"{node_id}_telemetry")
+        if username:
+            self.__client.username_pw_set(username, password)
+        self.__client.will_set(self.__availability_topic(), "offline", qos=1, retain=True)
+        self.__client.on_connect = self.__on_connect
+
+    def start(self) -> None:
+        """
+        This method connects to the broker in background, so it never blocks the caller.
+        The client reconnects by itself if the connection is lost.
+        """
+        self.__client.connect_async(self.__address, self.__port, MQTTTelemetry.KEEPALIVE)
+        self.__client.loop_start()
+        self.__thread = Thread(target=self.__clock.track(self.__flush_loop), name="FilamentBuddyMQTT", daemon=True)
+        self.__thread.start()
+        self.__logger.info(f"MQTT telemetry started on {self.__address}:{self.__port}/{self.__base_topic}")
+
+    def stop(self) -> None:
+        """
+        This method publishes the pending values, marks the printer as offline and disconnects.
+        """
+        self.__flush()
+        with self.__lock:
+            self.__stopped = True
+        self.__stop_event.set()
+        self.__pending_event.set()
+        self.__client.publish(self.__availability_topic(), "offline", qos=1, retain=True)
+        self.__client.disconnect()
+        self.__client.loop_stop()
+        self.__logger.info("MQTT telemetry stopped")
+
+    def publish(self, name: str, value) -> None:
+        """
+        This method schedules the publication of a value, if it differs from the published one.
+        :param name: one of the ENTITIES keys
+        :param value: a string, a number, a boolean or None
+        """
+        if name not in MQTTTelemetry.ENTITIES:
+            raise ValueError(f"Unknown telemetry value: {name}")
+        payload = MQTTTelemetry.__to_payload(value)
+
+        with self.__lock:
+            if name not in self.__pending and self.__published.get(name) == payload:
+                return
+            self.__pending[name] = payload
+            if self.__stopped:
+                return
+        self.__pending_event.set()
+
+    def __flush_loop(self):
+        """
+        A single thread publishes the values: it waits for the first pending one, then for
+        the coalescing window, during which the following changes are just collected.
+        """
+        while True:
+            self.__pending_event.wait()
+            if self.__stop_event.wait(self.__coalesce_time):
+                return
+            self.__pending_event.clear()
+            self.__flush()
+
+    def __flush(self):
+        with self.__lock:
+            if self.__stopped:
+                return
+            pending, self.__pending = self.__pending, {}
+            changed = {name: payload for name, payload in pending.items() if self.__published.get(name) != payload}
+            self.__published.update(changed)
+
+        for name, payload in changed.items():
+            self.__client.publish(self.__state_topic(name), payload, qos=1, retain=True)
+
+    def __on_connect(self, client, userdata, flags, rc, *args):
+        if rc != 0:
+            self.__logger.info(f"MQTT telemetry connection refused: {rc}")
+            return
+        self.__logger.info("MQTT telemetry connected")
+        client.publish(self.__availability_topic(), "online", qos=1, retain=True)
+        if self.__discovery_prefix:
+            for name in MQTTTelemetry.ENTITIES:
+                topic, config = self.__discovery(name)
+                client.publish(topic, json.dumps(config), qos=1, retain=True)
+        # After a reconnection, the broker may have lost the retained values
+        with self.__lock:
+            published = dict(self.__published)
+        for name, payload in published.items():
+            client.publish(self.__state_topic(name), payload, qos=1, retain=True)
+
+    def __discovery(self, name: str):
+        component, specific = MQTTTelemetry.ENTITIES[name]
+        unique_id = f"{self.__node_id}_{name}"
+        config = {
+            **specific,
+            "unique_id": unique_id,
+            "object_id": unique_id,
+            "state_topic": self.__state_topic(name),
+            "availability_topic": self.__availability_topic(),
+            "device": {
+                "identifiers": [self.__node_id],
+                "name": f"FilamentBuddy {self.__node_id}",
+                "manufacturer": "FilamentBuddy"
+            }
+        }
+        return f"{self.__discovery_prefix}/{component}/{self.__node_id}/{name}/config", config
+
+    def __state_topic(self, name: str) -> str:
+        return f"{self.__base_topic}/{name}"
+
+    def __availability_topic(self) -> str:
+        return f"{self.__base_topic}/availability"
+
+    @staticmethod
+    def __to_payload(value) -> str:
+        if value is None:
+            return "None"
+        if isinstance(value, bool):
+            return "ON" if value else "OFF"
+        return str(value)
@@ -0,0 +1,115 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from collections import OrderedDict
+from enum import Enum
+from threading import Lock
+from typing import Optional
+
+from ..manager import Clock
+
+
+class NotificationService:
+    """
+    This class is the only way the plugin notifies the user interface. Every notification
+    has a key, which identifies the situation it describes: a notification whose key has
+    been sent recently, or that is still active with the same message, is not broadcast
+    again. The notifications can also be retained until their situation is resolved, so
+    the clients connecting later can still show them.
+    """
+
+    RATE_LIMIT = 60  # s
+    RETAINED_SIZE = 20
+
+    def __init__(self, send_f, rate_limit: float = RATE_LIMIT, clock: Clock = None):
+        """
+        :param send_f: the action that broadcasts a message to all the connected clients
+        :param rate_limit: the minimum time in seconds between two notifications with the same key
+        :param clock: the source of time, the system one if None
+        """
+        self.__send_f = send_f
+        self.__clock = Clock() if clock is None else clock
+        self.__rate_limit = rate_limit
+        self.__lock = Lock()
+        self.__last_sent = {}
+        self.__retained = OrderedDict()
+
+    def notify(self, message: str, severity: "NotificationService.Severity" = None, key: Optional[str] = None,
+               retain: bool = False) -> bool:
+        """
+        This method sends a notification, unless it is a duplicate of a recent one.
+        :param message: the text to show
+        :param severity: how the user interface has to present it, notice if not specified
+        :param key: what identifies the notified situation, by default the message itself
+        :param retain: if true, the notification stays active until resolved
+        :return: true if the notification has been broadcast
+        """
+        severity = NotificationService.Severity.NOTICE if severity is None else severity
+        key = message if key is None else key
+        now = self.__clock.monotonic()
+
+        with self.__lock:
+            active = self.__retained.get(key)
+            if active is not None and active["message"] == message:
+                active["count"] += 1
+                return False
+
+            last = self.__last_sent.get(key)
+            if active is None and last is not None and now - last < self.__rate_limit:
+                return False
+
+            notification = {
+                "key": key,
+                "message": message,
+                "severity": severity.value,
+                "time": self.__clock.time(),
+                "count": 1,
+                "retained": retain
+            }
+            if retain:
+                self.__retained[key] = notification
+                self.__retained.move_to_end(key)
+                while len(self.__retained) > NotificationService.RETAINED_SIZE:
+                    self.__retained.popitem(last=False)
+            self.__last_sent[key] = now
+
+        self.__send_f({"type": "notification", **notification})
+        return True
+
+    def resolve(self, *keys: str) -> None:
+        """
+        This method deactivates the retained notifications, since their situation is over.
+        The clients are informed only for the ones that were effectively active.
+        :param keys: the keys of the notifications to deactivate
+        """
+        with self.__lock:
+            resolved = [key for key in keys if self.__retained.pop(key, None) is not None]
+            # A situation that happens again after being resolved is new, so it is not rate limited
+            for key in resolved:
+                self.__last_sent.pop(key, None)
+        for key in resolved:
+            self.__send_f({"type": "resolve", "key": key})
+
+    def get_active(self) -> list:
+        """
+        :return: the active notifications, from the oldest to the newest
+        """
+        with self.__lock:
+            return [dict(notification) for notification in self.__retained.values()]
+
+    class Severity(Enum):
+        INFO = "info"
+        NOTICE = "notice"
+        SUCCESS = "success"
+        ERROR = "error"
@@ -42,48 +42,28 @@ $(function () {
 
             // Filament changer
             self.server_fc_en(self.filamentbuddy.fc.en());
-            self.filamentbuddy.fc.en.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.command_mode.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.command.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.force_cold.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.filament_length.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.filament_speed.subscribe(self.regenerateFilamentChanger)
-            self.filamentbuddy.fc.target_x.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.target_y.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.z_hop.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.unload_command.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.load_command.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.use_unload.subscribe(self.regenerateFilamentChanger);
-            self.filamentbuddy.fc.filament_length.subscribe(
-                value => self.filamentbuddy.fc.filament_length(self.makeInteger(value))
-            );
-            self.filamentbuddy.fc.filament_speed.subscribe(
-                value => self.filamentbuddy.fc.filament_speed(self.makeInteger(value))
-            )
-            self.filamentbuddy.fc.target_x.subscribe(
-                value => self.filamentbuddy.fc.target_x(self.makeInteger(value))
-            );
-            self.filamentbuddy.fc.target_y.subscribe(
-                value => self.filamentbuddy.fc.target_y(self.makeInteger(value))
-            );
-            self.filamentbuddy.fc.z_hop.subscribe(
-                value => self.filamentbuddy.fc.z_hop(self.makeInteger(value))
-            );
-            self.filamentbuddy.fc.min_tool_temp.subscribe(
-                value => self.filamentbuddy.fc.min_tool_temp(self.makeInteger(value))
-            );
-            self.regenerateFilamentChanger();
+            [
+                self.filamentbuddy.fc.filament_length,
+                self.filamentbuddy.fc.filament_speed,
+                self.filamentbuddy.fc.target_x,
+                self.filamentbuddy.fc.target_y,
+                self.filamentbuddy.fc.z_hop,
+                self.filamentbuddy.fc.min_tool_temp
+            ].forEach(self.keepInteger);
 
             // Filament sensor
-            self.filamentbuddy.fs.polling_time.subscribe(
-                value => self.filamentbuddy.fs.polling_time(self.makeInteger(value))
-            );
-            self.filamentbuddy.fs.run_out_time.subscribe(
-                value => self.filamentbuddy.fs.run_out_time(self.makeInteger(value))
-            );
-            self.filamentbuddy.fs.mqtt_port.subscribe(
-                value => self.filamentbuddy.fs.mqtt_port(self.makeInteger(value))
-            );
+            [
+                self.filamentbuddy.fs.polling_time,
+                self.filamentbuddy.fs.run_out_time,
+                self.filamentbuddy.fs.filter_window,
+                self.filamentbuddy.fs.filter_missing_votes,
+                self.filamentbuddy.fs.filter_return_votes,
+                self.filamentbuddy.fs.filter_stable_time,
+                self.filamentbuddy.fs.filter_sample_time,
+                self.filamentbuddy.fs.weight_spool_mass,
+                self.filamentbuddy.fs.weight_threshold,
+                self.filamentbuddy.fs.mqtt_port
+            ].forEach(self.keepInteger);
             self.filamentbuddy.fs.en.subscribe(value => {
                 self.stopUpdatingFilamentSensor();
                 if(value)
@@ -93,15 +73,22 @@ $(function () {
                 self.updateFilamentStatus()
 
             // Filament remover
-            self.filamentbuddy.fr.min_needed_temp.subscribe(
-                value => self.filamentbuddy.fr.min_needed_temp(self.makeInteger((value)))
-            );
-            self.filamentbuddy.fr.retract_length.subscribe(
-                value => self.filamentbuddy.fr.retract_length(self.makeInteger(value))
-            );
-            self.filamentbuddy.fr.extrude_length.subscribe(
-                value => self.filamentbuddy.fr.extrude_length(self.makeInteger(value))
-            );
+            [
+                self.filamentbuddy.fr.min_needed_temp,
+                self.filamentbuddy.fr.retract_length,
+                self.filamentbuddy.fr.extrude_length
+            ].forEach(self.keepInteger);
+
+            // The GPIO capabilities are needed only by the sensor pane
+            self.rendered_panes.sensor.subscribe(rendered => {
+                if(rendered)
+                    self.fetchGPIOCapabilities();
+            });
+
+            $('#settings_plugin_filamentbuddy a[data-toggle="tab"]').on("shown", event => {
+                let pane = $(event.target).attr("href").replace("#filamentbuddy_", "");
+                self.measureScriptTime(`${pane} pane rendering`, () => self.renderPane(pane));
+            });
         }
 
         self.sendGCode = (commands) => {
@@ -111,13 +98,52 @@ $(function () {
         }
 
         self.makeInteger = value => {
-            try {
-                let newValue = value.replace(/\D/g, '');
-                return newValue ? newValue : "0";
-            }
-            catch(TypeError){
-                return "0";
-            }
+            let newValue = String(value ?? "").replace(/\D/g, '');
+            return newValue ? newValue : "0";
+        }
+
+        // The field is written back only when something has been removed, so a valid value costs nothing
+        self.keepInteger = observable => {
+            observable.subscribe(value => {
+                let newValue = self.makeInteger(value);
+                if(newValue !== String(value ?? ""))
+                    observable(newValue);
+            });
+        }
+
+        self.SCRIPT_TIME_BUDGET = 50; //ms, the browsers report longer tasks as blocking the page
+
+        // The rate-limited computeds given as pending are read at the end, which evaluates them at once if any
+        // dependency changed, so the time includes the recomputation that would otherwise run after the limit;
+        // the ones without subscribers are skipped, since nothing would recompute them
+        self.measureScriptTime = (label, action, pending = []) => {
+            let start = performance.now();
+            action();
+            pending.filter((computed) => computed.getSubscriptionsCount() > 0).forEach((computed) => computed());
+            let elapsed = performance.now() - start;
+            if(elapsed > self.SCRIPT_TIME_BUDGET)
+                console.warn(`FilamentBuddy: ${label} took ${elapsed.toFixed(1)} ms, over the ` +
+                             `${self.SCRIPT_TIME_BUDGET} ms budget`);
+            else
+                console.debug(`FilamentBuddy: ${label} took ${elapsed.toFixed(1)} ms`);
+        }
+
+        // The panes are bound the first time they are shown and then kept, so opening the settings binds one only
+        self.rendered_panes = {
+            changer: ko.observable(false),
+            sensor: ko.observable(false),
+            remover: ko.observable(false)
+        };
+
+        self.renderPane = (pane) => {
+            if(pane in self.rendered_panes)
+                self.rendered_panes[pane](true);
+        }
+
+        self.onSettingsShown = () => {
+            let pane = $("#settings_plugin_filamentbuddy .tab-pane.active").attr("id") ?? "filamentbuddy_changer";
+            pane = pane.replace("filamentbuddy_", "");
+            self.measureScriptTime("settings opening", () => self.renderPane(pane));
         }
 
         self.notifyType = Object.freeze({
@@ -130,21 +156,71 @@ $(function () {
         self.DEFAULT_NOTIFICATION_DURATION = 20_000; //ms
         self.ERROR_NOTIFICATION_DURATION = 120_000; //ms
 
-        self.notify = (message, type = self.notifyType.info) => {
-            new PNotify({
+        self.notify = (message, type = self.notifyType.info, sticky = false) => {
+            return new PNotify({
                 type: type,
                 title: "FilamentBuddy",
                 text: message,
+                hide: !sticky,
                 delay: self.notifyType.error === type ?
                     self.ERROR_NOTIFICATION_DURATION : self.DEFAULT_NOTIFICATION_DURATION
             });
         }
 
+        // The server notifications shown, by key, so a newer one replaces the previous
+        self.shown_notifications = {};
+
+        self.showServerNotification = (notification) => {
+            self.closeServerNotification(notification.key);
+            self.shown_notifications[notification.key] = self.notify(
+                notification.message,
+                notification.severity,
+                notification.retained
+            );
+        }
+
+        self.closeServerNotification = (key) => {
+            if(!(key in self.shown_notifications))
+                return;
+            self.shown_notifications[key].remove();
+            delete self.shown_notifications[key];
+        }
+
+        self.fetchActiveNotifications = () => {
+            $.ajax({
+                url: API_BASEURL + "plugin/filamentbuddy",
+                type: "POST",
+                dataType: "json",
+                contentType: "application/json; charset=UTF-8",
+                data: JSON.stringify({
+                    command: "active_notifications"
+                })
+            }).done(function (data) {
+                data['notifications'].forEach(self.showServerNotification);
+            }).fail(function () {
+                console.log("Impossible to retrieve the active notifications");
+            });
+        }
+
+        // The active notifications are fetched once, instead of relying on being connected when they are sent
+        self.onStartupComplete = self.fetchActiveNotifications;
+        self.onServerReconnect = self.fetchActiveNotifications;
+
         self.onDataUpdaterPluginMessage = (identifier, data) => {
             if("filamentbuddy" !== identifier)
                 return;
 
-            self.notify(data.message, data.is_severe ? self.notifyType.error : self.notifyType.notice);
+            if("weight" === data.type){
+                self.filament_weight(data.weight);
+                return;
+            }
+
+            if("resolve" === data.type){
+                self.closeServerNotification(data.key);
+                return;
+            }
+
+            self.showServerNotification(data);
         }
 
         self.askConfirmationBeforeExecuting = (message, toExecute) => {
@@ -177,33 +253,25 @@ $(function () {
         /***** FILAMENT CHANGER *****/
 
         self.server_fc_en = ko.observable();
-        self.gen_unload_com = ko.observable();
-        self.gen_load_com = ko.observable();
+        self.FC_RATE_LIMIT = 100; //ms
 
-        self.regenerateFilamentChanger = () => {
-            if(!self.filamentbuddy.fc.en()){
-                self.gen_unload_com("-");
-                self.gen_load_com("-");
-                return;
-            }
+        self.generateFilamentChanger = () => {
+            if(!self.filamentbuddy.fc.en())
+                return {unload: "-", load: "-"};
 
             if("simplified" === self.filamentbuddy.fc.command_mode()){
-                if("m600" === self.filamentbuddy.fc.command()){
-                    self.gen_unload_com("M600 X0 Y0");
-                    self.gen_load_com("M600");
-                    return;
-                }
+                if("m600" === self.filamentbuddy.fc.command())
+                    return {unload: "M600 X0 Y0", load: "M600"};
 
                 if("g1" === self.filamentbuddy.fc.command()){
                     let c = self.filamentbuddy.fc.force_cold() ? "M302 P1\n" : "";
-                    self.gen_unload_com(c + "G91\nG1 E-10\nG90");
-                    self.gen_load_com(c + "G91\nG1 E10\nG90");
-                    return;
+                    return {
+                        unload: c + "G91\nG1 E-10\nG90",
+                        load: c + "G91\nG1 E10\nG90"
+                    };
                 }
 
-                self.gen_unload_com("M702");
-                self.gen_load_com("M701");
-                return;
+                return {unload: "M702", load: "M701"};
             }
 
             if("complete" === self.filamentbuddy.fc.command_mode()){
@@ -213,34 +281,39 @@ $(function () {
                 let z_h = self.filamentbuddy.fc.z_hop();
                 let s = self.filamentbuddy.fc.filament_speed();
 
-                if("m600" === self.filamentbuddy.fc.command()){
-                    self.gen_unload_com(
-                        `M600 X0 Y0 L${-length} X${t_x} Y${t_y} Z${z_h}`
-                    );
-                    self.gen_load_com(`M600 L${length}`);
-                    return;
-                }
+                if("m600" === self.filamentbuddy.fc.command())
+                    return {
+                        unload: `M600 X0 Y0 L${-length} X${t_x} Y${t_y} Z${z_h}`,
+                        load: `M600 L${length}`
+                    };
 
                 if("g1" === self.filamentbuddy.fc.command()){
                     let c = self.filamentbuddy.fc.force_cold() ? "M302 P1\n" : "";
-                    self.gen_unload_com(`${c}G91\nG1 E${-length} Z${z_h} F${s}\nG90`);
-                    self.gen_load_com(`${c}G91\nG1 E${length} Z${-z_h} F${s}\nG90`);
-                    return;
+                    return {
+                        unload: `${c}G91\nG1 E${-length} Z${z_h} F${s}\nG90`,
+                        load: `${c}G91\nG1 E${length} Z${-z_h} F${s}\nG90`
+                    };
                 }
 
-                self.gen_unload_com(`M702 U${length} Z${z_h}`);
-                self.gen_load_com(`M701 L${length}`);
-                return;
+                return {unload: `M702 U${length} Z${z_h}`, load: `M701 L${length}`};
             }
 
-            self.gen_unload_com(self.filamentbuddy.fc.unload_command());
-            self.gen_load_com(
-                self.filamentbuddy.fc.use_unload() ?
+            return {
+                unload: self.filamentbuddy.fc.unload_command(),
+                load: self.filamentbuddy.fc.use_unload() ?
                     self.filamentbuddy.fc.unload_command() :
                     self.filamentbuddy.fc.load_command()
-            );
+            };
         }
 
+        // A single computed tracks the parameters actually read, and a burst of changes, as a reset, is
+        // recomputed once when it stops; it is pure, so nothing is computed while the pane is not bound
+        self.gen_fc_commands = ko.pureComputed(self.generateFilamentChanger).extend({
+            rateLimit: {timeout: self.FC_RATE_LIMIT, method: "notifyWhenChangesStop"}
+        });
+        self.gen_unload_com = ko.pureComputed(() => self.gen_fc_commands().unload);
+        self.gen_load_com = ko.pureComputed(() => self.gen_fc_commands().load);
+
         self.unloadFilament = () => {
             if(!self.filamentbuddy.fc.en())
                 return;
@@ -256,8 +329,7 @@ $(function () {
                 return;
             }
 
-            self.regenerateFilamentChanger();
-            self.sendGCode(self.gen_unload_com());
+            self.sendGCode(self.generateFilamentChanger().unload);
         }
 
         self.loadFilament = () => {
@@ -270,8 +342,7 @@ $(function () {
                 return;
             }
 
-            self.regenerateFilamentChanger();
-            self.sendGCode(self.gen_load_com());
+            self.sendGCode(self.generateFilamentChanger().load);
         }
 
         self.getAdditionalControls = () =>{
@@ -304,21 +375,23 @@ $(function () {
 
         self.resetFilamentChanger = () => {
             self.requireReset(() => {
-                let def = self.filamentbuddy.default;
-
-                self.filamentbuddy.fc.en(def.fc.en());
-                self.filamentbuddy.fc.command_mode(def.fc.command_mode());
-                self.filamentbuddy.fc.command(def.fc.command());
-                self.filamentbuddy.fc.force_cold(def.fc.force_cold());
-                self.filamentbuddy.fc.filament_length(def.fc.filament_length());
-                self.filamentbuddy.fc.filament_speed(def.fc.filament_speed());
-                self.filamentbuddy.fc.target_x(def.fc.target_x());
-                self.filamentbuddy.fc.target_y(def.fc.target_y());
-                self.filamentbuddy.fc.z_hop(def.fc.z_hop());
-                self.filamentbuddy.fc.unload_command(def.fc.unload_command());
-                self.filamentbuddy.fc.load_command(def.fc.load_command());
-                self.filamentbuddy.fc.use_unload(def.fc.use_unload());
-                self.filamentbuddy.fc.min_tool_temp(def.fc.min_tool_temp());
+                self.measureScriptTime("Filament Changer reset", () => {
+                    let def = self.filamentbuddy.default;
+
+                    self.filamentbuddy.fc.en(def.fc.en());
+                    self.filamentbuddy.fc.command_mode(def.fc.command_mode());
+                    self.filamentbuddy.fc.command(def.fc.command());
+                    self.filamentbuddy.fc.force_cold(def.fc.force_cold());
+                    self.filamentbuddy.fc.filament_length(def.fc.filament_length());
+                    self.filamentbuddy.fc.filament_speed(def.fc.filament_speed());
+                    self.filamentbuddy.fc.target_x(def.fc.target_x());
+                    self.filamentbuddy.fc.target_y(def.fc.target_y());
+                    self.filamentbuddy.fc.z_hop(def.fc.z_hop());
+                    self.filamentbuddy.fc.unload_command(def.fc.unload_command());
+                    self.filamentbuddy.fc.load_command(def.fc.load_command());
+                    self.filamentbuddy.fc.use_unload(def.fc.use_unload());
+                    self.filamentbuddy.fc.min_tool_temp(def.fc.min_tool_temp());
+                }, [self.gen_fc_commands]);
                 self.settingsViewModel.saveData();
             });
         }
@@ -342,8 +415,11 @@ $(function () {
                     command: "filament_status"
                 })
             }).done(function (data) {
-                if(data['state'])
+                if(data['state']) {
                     self.is_filament_available(data['filament']);
+                    self.filament_weight(data['details']['weight'] ?? null);
+                    self.filter_statistics(data['details']['filter'] ?? null);
+                }
                 self.is_filament_error(!data['state']);
             }).fail(function () {
                 if(!self.is_filament_error())
@@ -359,6 +435,54 @@ $(function () {
             );
         }
 
+        self.filament_weight = ko.observable(null);
+        self.filter_statistics = ko.observable(null);
+
+        self.filter_summary = ko.pureComputed(() => {
+            let statistics = self.filter_statistics();
+            if(!statistics || !self.filamentbuddy.fs.filter_en())
+                return "";
+            return `${statistics['samples']} samples in ${statistics['bursts']} bursts, ` +
+                `${statistics['disagreeing']} disagreeing, ${statistics['missing']} missing and ` +
+                `${statistics['returned']} returned, ${statistics['rejected']} changes rejected as unstable, ` +
+                `longest burst of ${statistics['max_burst']} samples.`;
+        });
+        self.calibration_mass = ko.observable(1000);
+
+        self.sendWeightCommand = (command, data = {}) => {
+            $.ajax({
+                url: API_BASEURL + "plugin/filamentbuddy",
+                type: "POST",
+                dataType: "json",
+                contentType: "application/json; charset=UTF-8",
+                data: JSON.stringify({
+                    command: command,
+                    ...data
+                })
+            }).done(function (data) {
+                self.filamentbuddy.fs.weight_tare(data['weight_tare']);
+                self.filamentbuddy.fs.weight_scale(data['weight_scale']);
+                self.notify("Load cell updated and saved", self.notifyType.success);
+            }).fail(function (xhr) {
+                self.notify("The load cell refused the operation: " + xhr.statusText, self.notifyType.error);
+            });
+        }
+
+        self.tareLoadCell = () => {
+            self.askConfirmationBeforeExecuting(
+                "Remove the spool from the holder before proceeding. The current weight will become the zero.",
+                () => self.sendWeightCommand("weight_tare")
+            );
+        }
+
+        self.calibrateLoadCell = () => {
+            self.askConfirmationBeforeExecuting(
+                "Place the reference mass of " + self.calibration_mass() + " g on the tared holder before " +
+                "proceeding.",
+                () => self.sendWeightCommand("weight_calibrate", {mass: parseFloat(self.calibration_mass())})
+            );
+        }
+
         self.stopUpdatingFilamentSensor = () => {
             if(self.fs_timeout != null) {
                 clearTimeout(self.fs_timeout);
@@ -366,6 +490,57 @@ $(function () {
             }
         }
 
+        self.PERIPHERY_CHIP = "/dev/gpiochip0";
+        self.GPIO_PROBE_RETRY_TIME = 2_000; //ms
+        self.GPIO_PROBE_RETRIES = 5;
+        self.gpio_capabilities = ko.observable(null);
+        self.blinka_pins = ko.observableArray([]);
+
+        self.fetchGPIOCapabilities = (retries = self.GPIO_PROBE_RETRIES) => {
+            $.ajax({
+                url: API_BASEURL + "plugin/filamentbuddy",
+                type: "POST",
+                dataType: "json",
+                contentType: "application/json; charset=UTF-8",
+                data: JSON.stringify({
+                    command: "gpio_capabilities"
+                })
+            }).done(function (data) {
+                self.blinka_pins(data['blinka_pins']);
+                self.gpio_capabilities(data['capabilities']);
+                // The server is still probing the GPIO
+                if(data['capabilities'] === null && retries > 0)
+                    setTimeout(() => self.fetchGPIOCapabilities(retries - 1), self.GPIO_PROBE_RETRY_TIME);
+            }).fail(function () {
+                console.log("Impossible to retrieve the GPIO capabilities");
+            });
+        }
+
+        // The pins suggested to the user, from the board for Blinka and from the chip lines for periphery
+        self.suggested_pins = ko.pureComputed(() => {
+            if("b_polling" === self.filamentbuddy.fs.sensor_mode())
+                return self.blinka_pins().map(pin => ({value: pin, label: `D${pin}`}));
+
+            let capabilities = self.gpio_capabilities();
+            let chip = capabilities ? capabilities['chips'].find(chip => chip['path'] === self.PERIPHERY_CHIP) : null;
+            if(!chip)
+                return [];
+            return chip['lines'].map(line => ({
+                value: line['offset'],
+                label: (line['name'] || `Line ${line['offset']}`) +
+                    (line['used'] ? `, used by ${line['consumer'] || "the kernel"}` : "")
+            }));
+        });
+
+        self.gpio_summary = ko.pureComputed(() => {
+            let capabilities = self.gpio_capabilities();
+            if(!capabilities)
+                return "";
+            let supported = ["bias", "edge", "debounce"].filter(feature => capabilities[feature]);
+            return `Detected GPIO chips: ${capabilities['chips'].length}, ` +
+                `line features: ${supported.length ? supported.join(", ") : "none"}.`;
+        });
+
         self.isMQTTPWShown = ko.observable(false);
         self.updateMQTTPasswordState = () => self.isMQTTPWShown(!self.isMQTTPWShown());
 
@@ -392,36 +567,58 @@ $(function () {
 
         self.resetFilamentSensor = () => {
             self.requireReset(() => {
-                let def = self.filamentbuddy.default;
-
-                self.filamentbuddy.fs.en(def.fs.en());
-                self.filamentbuddy.fs.sensor_pin(def.fs.sensor_pin());
-                self.filamentbuddy.fs.sensor_mode(def.fs.sensor_mode());
-                self.filamentbuddy.fs.polling_time(def.fs.polling_time());
-                self.filamentbuddy.fs.run_out_time(def.fs.run_out_time());
-                self.filamentbuddy.fs.use_pause(def.fs.use_pause());
-                self.filamentbuddy.fs.run_out_command(def.fs.run_out_command());
-                self.filamentbuddy.fs.empty_voltage(def.fs.empty_voltage());
-                self.filamentbuddy.fs.invert_pull(def.fs.invert_pull());
-                self.filamentbuddy.fs.toolbar_time(def.fs.toolbar_time());
-                self.filamentbuddy.fs.toolbar_en(def.fs.toolbar_en());
+                self.measureScriptTime("Filament Sensor reset", () => {
+                    let def = self.filamentbuddy.default;
+
+                    self.filamentbuddy.fs.en(def.fs.en());
+                    self.filamentbuddy.fs.sensor_pin(def.fs.sensor_pin());
+                    self.filamentbuddy.fs.sensor_mode(def.fs.sensor_mode());
+                    self.filamentbuddy.fs.polling_time(def.fs.polling_time());
+                    self.filamentbuddy.fs.run_out_time(def.fs.run_out_time());
+                    self.filamentbuddy.fs.use_pause(def.fs.use_pause());
+                    self.filamentbuddy.fs.run_out_command(def.fs.run_out_command());
+                    self.filamentbuddy.fs.auto_resume(def.fs.auto_resume());
+                    self.filamentbuddy.fs.reinsert_time(def.fs.reinsert_time());
+                    self.filamentbuddy.fs.reinsert_command(def.fs.reinsert_command());
+                    self.filamentbuddy.fs.empty_voltage(def.fs.empty_voltage());
+                    self.filamentbuddy.fs.invert_pull(def.fs.invert_pull());
+                    self.filamentbuddy.fs.filter_en(def.fs.filter_en());
+                    self.filamentbuddy.fs.filter_window(def.fs.filter_window());
+                    self.filamentbuddy.fs.filter_missing_votes(def.fs.filter_missing_votes());
+                    self.filamentbuddy.fs.filter_return_votes(def.fs.filter_return_votes());
+                    self.filamentbuddy.fs.filter_stable_time(def.fs.filter_stable_time());
+                    self.filamentbuddy.fs.filter_sample_time(def.fs.filter_sample_time());
+                    self.filamentbuddy.fs.clock_pin(def.fs.clock_pin());
+                    self.filamentbuddy.fs.weight_tare(def.fs.weight_tare());
+                    self.filamentbuddy.fs.weight_scale(def.fs.weight_scale());
+                    self.filamentbuddy.fs.weight_spool_mass(def.fs.weight_spool_mass());
+                    self.filamentbuddy.fs.weight_threshold(def.fs.weight_threshold());
+                    self.filamentbuddy.fs.toolbar_time(def.fs.toolbar_time());
+                    self.filamentbuddy.fs.toolbar_en(def.fs.toolbar_en());
+                });
                 self.settingsViewModel.saveData();
             });
         }
 
         self.resetFilamentSensorMQTTPart = () => {
             self.requireReset(() => {
-                let def = self.filamentbuddy.default;
-
-                self.filamentbuddy.fs.mqtt_en(def.fs.mqtt_en());
-                self.filamentbuddy.fs.mqtt_address(def.fs.mqtt_address());
-                self.filamentbuddy.fs.mqtt_port(def.fs.mqtt_port());
-                self.filamentbuddy.fs.mqtt_client_id(def.fs.mqtt_client_id());
-                self.filamentbuddy.fs.mqtt_use_login(def.fs.mqtt_use_login());
-                self.filamentbuddy.fs.mqtt_username(def.fs.mqtt_username());
-                self.filamentbuddy.fs.mqtt_password(def.fs.mqtt_password());
-                self.filamentbuddy.fs.mqtt_topic(def.fs.mqtt_topic());
-                self.filamentbuddy.fs.mqtt_message_string(def.fs.mqtt_message_string());
+                self.measureScriptTime("Filament Sensor MQTT reset", () => {
+                    let def = self.filamentbuddy.default;
+
+                    self.filamentbuddy.fs.mqtt_en(def.fs.mqtt_en());
+                    self.filamentbuddy.fs.mqtt_address(def.fs.mqtt_address());
+                    self.filamentbuddy.fs.mqtt_port(def.fs.mqtt_port());
+                    self.filamentbuddy.fs.mqtt_client_id(def.fs.mqtt_client_id());
+                    self.filamentbuddy.fs.mqtt_use_login(def.fs.mqtt_use_login());
+                    self.filamentbuddy.fs.mqtt_username(def.fs.mqtt_username());
+                    self.filamentbuddy.fs.mqtt_password(def.fs.mqtt_password());
+                    self.filamentbuddy.fs.mqtt_topic(def.fs.mqtt_topic());
+                    self.filamentbuddy.fs.mqtt_message_string(def.fs.mqtt_message_string());
+                    self.filamentbuddy.fs.mqtt_telemetry_en(def.fs.mqtt_telemetry_en());
+                    self.filamentbuddy.fs.mqtt_base_topic(def.fs.mqtt_base_topic());
+                    self.filamentbuddy.fs.mqtt_discovery_en(def.fs.mqtt_discovery_en());
+                    self.filamentbuddy.fs.mqtt_discovery_prefix(def.fs.mqtt_discovery_prefix());
+                });
                 self.settingsViewModel.saveData();
             });
         }
@@ -431,18 +628,20 @@ $(function () {
 
         self.resetFilamentRemover = () => {
             self.requireReset(() => {
-                let def = self.filamentbuddy.default;
-
-                self.filamentbuddy.fr.en(def.fr.en());
-                self.filamentbuddy.fr.hook_mode(def.fr.hook_mode())
-                self.filamentbuddy.fr.min_needed_temp(def.fr.min_needed_temp())
-                self.filamentbuddy.fr.command_mode(def.fr.command_mode());
-                self.filamentbuddy.fr.retract_length(def.fr.retract_length());
-                self.filamentbuddy.fr.extrude_length(def.fr.extrude_length());
-                self.filamentbuddy.fr.force_cold(def.fr.force_cold());
-                self.filamentbuddy.fr.retract_command(def.fr.retract_command());
-                self.filamentbuddy.fr.extrude_command(def.fr.extrude_command());
-                self.filamentbuddy.fr.use_unload(def.fr.use_unload());
+                self.measureScriptTime("Filament Remover reset", () => {
+                    let def = self.filamentbuddy.default;
+
+                    self.filamentbuddy.fr.en(def.fr.en());
+                    self.filamentbuddy.fr.hook_mode(def.fr.hook_mode())
+                    self.filamentbuddy.fr.min_needed_temp(def.fr.min_needed_temp())
+                    self.filamentbuddy.fr.command_mode(def.fr.command_mode());
+                    self.filamentbuddy.fr.retract_length(def.fr.retract_length());
+                    self.filamentbuddy.fr.extrude_length(def.fr.extrude_length());
+                    self.filamentbuddy.fr.force_cold(def.fr.force_cold());
+                    self.filamentbuddy.fr.retract_command(def.fr.retract_command());
+                    self.filamentbuddy.fr.extrude_command(def.fr.extrude_command());
+                    self.filamentbuddy.fr.use_unload(def.fr.use_unload());
+                });
                 self.settingsViewModel.saveData();
             });
         }
@@ -517,12 +716,39 @@ $(function () {
                     //"executed only when the pin state changes.</li>
                     "<li>Periphery polling: periodically checks the filament through Periphery Python module.</li>" +
                     "<li>Adafruit Blinka polling: same as the previous but through a different module.</li>" +
+                    "<li>HX711 load cell: weighs the spool and considers the filament over when the remaining " +
+                    "grams go under a threshold.</li>" +
                     "</ul>" +
-                    "Both these methods suppose to have the pin permanently in a state when the filament is " +
+                    "The two polling methods suppose to have the pin permanently in a state when the filament is " +
                     "available and permanently in the other when it is not.<br>" +
                     "The plugin doesn't stop immediately the print when the filament becomes unavailable but wait " +
                     "for a user defined time to avoid errors."
                 ],
+                "clock_pin": [
+                    "BCM clock pin",
+                    "The HX711 amplifier uses two pins: the sensor pin above has to be connected to its <i>DOUT</i> " +
+                    "while this one to its <i>PD_SCK</i>. Both must be in BCM format."
+                ],
+                "weight_spool_mass": [
+                    "Empty spool mass",
+                    "This is the mass in grams of the spool without filament, which is subtracted from the weight " +
+                    "to obtain the remaining filament. It is usually written on the spool label or on the vendor " +
+                    "website."
+                ],
+                "weight_threshold": [
+                    "Run out threshold",
+                    "When the remaining filament in grams stays under this value for the run out time, the " +
+                    "filament is considered over."
+                ],
+                "weight_calibration": [
+                    "Load cell calibration",
+                    "The load cell has to be calibrated once before using it:<ol>" +
+                    "<li>remove the spool from the holder and press <i>Tare</i>;</li>" +
+                    "<li>place an object whose mass is known, wait a few seconds for the reading to settle, write " +
+                    "its mass in the field and press <i>Calibrate</i>." +
+                    "</li></ol>" +
+                    "The results are saved automatically. Repeat the procedure if the holder is modified."
+                ],
                 "polling_time": [
                     "Polling time",
                     "When polling, the plugin waits for a certain amount of time before repeating the filament " +
@@ -541,6 +767,35 @@ $(function () {
                     "This organization allows, in case the user needs it, to stop the printer just via G-code, " +
                     "without passing via OctoPrint pausing feature."
                 ],
+                "auto_resume": [
+                    "Automatic resume",
+                    "When enabled, the plugin keeps watching the sensor after the filament has run out. As soon " +
+                    "as the new filament stays inserted for the reinsertion time, the G-code snippet is executed, " +
+                    "to purge or to load the filament, and then the print is resumed.<br>" +
+                    "The reinsertion time avoids to resume the print while the filament is still being handled, " +
+                    "so it should be long enough to complete the insertion."
+                ],
+                "filter_en": [
+                    "Noise filter",
+                    "Vibrations and long wires can make the sensor report a wrong value for a short time, causing " +
+                    "false run outs or a missing filament considered returned. When the filter is enabled, every " +
+                    "check reads a short burst of samples and decides by majority, accepting a change only when " +
+                    "it stays stable. The statistics shown below help to tune it for the printer."
+                ],
+                "filter_votes": [
+                    "Filter votes",
+                    "Every check reads at least a window of samples. The filament is considered missing when the " +
+                    "samples without it are at least the votes for missing, and present again when the samples " +
+                    "with it are at least the votes for returned. Requiring more votes to return than to go " +
+                    "missing keeps the state unchanged while the sensor is flickering."
+                ],
+                "filter_timing": [
+                    "Filter timing",
+                    "A change has to be supported by the votes for the whole stable time to be accepted, " +
+                    "otherwise it is counted as rejected. The sample time is the pause between two reads: longer " +
+                    "times use less CPU and cover longer disturbances with the same window, while shorter ones " +
+                    "make the check faster."
+                ],
                 "empty_voltage": [
                     "Empty sensor voltage",
                     "The digital pin has two states, low and high. Some sensor uses high to communicate the filament " +
@@ -582,6 +837,20 @@ $(function () {
                 "mqtt_message_string":[
                     "MQTT message",
                     "This is the message the plugin has to send to the broker."
+                ],
+                "mqtt_telemetry_en":[
+                    "MQTT telemetry",
+                    "When enabled, the plugin stays connected to the broker and publishes its state as retained " +
+                    "topics under the base topic: filament availability, sensor state, filament remover state and " +
+                    "last action, pause reason, last run out and remaining spool weight. A value is published " +
+                    "only when it changes, and quick changes are merged, so a flickering sensor cannot flood the " +
+                    "broker.<br>This uses the same broker, client ID and authentication of the run out message."
+                ],
+                "mqtt_discovery":[
+                    "Home Assistant discovery",
+                    "If enabled, the plugin also publishes the Home Assistant MQTT discovery configurations, so " +
+                    "the telemetry values appear automatically as entities of a FilamentBuddy device. The prefix " +
+                    "has to match the one configured in Home Assistant, which is <i>homeassistant</i> by default."
                 ]
             },
             "fr": {
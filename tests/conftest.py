@@ -0,0 +1,96 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+
+
+class StandInClient:
+    """
+    A local stand-in of the paho client: it records what reaches the broker and lets
+    the test decide when the connection is established.
+    """
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_publish = None
+        self.will = None
+        self.credentials = None
+        self.published = []
+        self.connected_to = None
+        self.looping = False
+
+    def username_pw_set(self, username, password=None):
+        self.credentials = (username, password)
+
+    def will_set(self, topic, payload, qos=0, retain=False):
+        self.will = (topic, payload, qos, retain)
+
+    def connect(self, host, port=1883, keepalive=60):
+        self.connect_async(host, port, keepalive)
+
+    def connect_async(self, host, port=1883, keepalive=60):
+        # As paho does, before trying to reach the broker
+        if not host:
+            raise ValueError("Invalid host.")
+        self.connected_to = (host, port, keepalive)
+
+    def loop_start(self):
+        self.looping = True
+
+    def loop_stop(self):
+        self.looping = False
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload, qos, retain))
+        return StandInClient.MessageInfo()
+
+    def accept(self, rc: int = 0):
+        """
+        This method answers the connection request, as the broker would.
+        :param rc: the connection result, 0 if accepted
+        """
+        self.on_connect(self, None, {}, rc)
+
+    def take(self) -> list:
+        """
+        :return: the messages published since the last call
+        """
+        published, self.published = self.published, []
+        return published
+
+    class MessageInfo:
+        def wait_for_publish(self, timeout=None):
+            pass
+
+
+class StandInBroker:
+    """
+    The factory of the stand-in clients, which keeps all the clients it created.
+    """
+
+    def __init__(self):
+        self.clients = []
+
+    def client(self, client_id: str) -> StandInClient:
+        self.clients.append(StandInClient(client_id))
+        return self.clients[-1]
+
+
+@pytest.fixture
+def broker():
+    return StandInBroker()
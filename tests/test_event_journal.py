@@ -0,0 +1,52 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+import os
+
+from octoprint_filamentbuddy.manager import VirtualClock
+from octoprint_filamentbuddy.service import EventJournal
+
+
+def test_segments_are_indexed_in_the_writer_thread(tmp_path):
+    clock = VirtualClock(1000)
+    journal = EventJournal(logging.getLogger("test"), str(tmp_path), max_segment_size=256, clock=clock)
+    journal.start()
+    for i in range(20):
+        clock.advance(1)
+        journal.record("run_out" if i % 2 else "reinserted", index=i)
+    journal.stop()
+
+    restarted = EventJournal(logging.getLogger("test"), str(tmp_path), max_segment_size=256, clock=clock)
+    restarted.start()
+    restarted.record("mqtt_error", error="refused")
+    restarted.stop()
+
+    assert restarted.stats() == {"run_out": 10, "reinserted": 10, "mqtt_error": 1}
+    records = restarted.query(start=1010, types=["run_out"])
+    assert [record["index"] for record in records] == [9, 11, 13, 15, 17, 19]
+
+
+def test_unusable_folder_does_not_stop_the_plugin(tmp_path, caplog):
+    folder = tmp_path / "journal"
+    folder.write_text("not a folder")
+
+    journal = EventJournal(logging.getLogger("test"), str(folder))
+    journal.start()
+    journal.record("run_out")
+    journal.stop()
+
+    assert journal.query() == []
+    assert "Impossible to open the journal folder" in caplog.text
+    assert os.path.isfile(folder)
@@ -0,0 +1,59 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+
+from octoprint_filamentbuddy.manager import VirtualClock
+from octoprint_filamentbuddy.service import GPIOCapabilityProbe
+
+
+def test_report_is_cached(tmp_path):
+    clock = VirtualClock(1000)
+    cache_file = tmp_path / "gpio_capabilities.json"
+    probe = GPIOCapabilityProbe(logging.getLogger("test"), clock)
+    try:
+        probe.start(str(cache_file))
+        clock.settle()
+        report = probe.get_capabilities()
+        assert report is not None and report["time"] == 1000
+        assert cache_file.exists()
+    finally:
+        probe.stop()
+
+    clock = VirtualClock(2000)
+    restarted = GPIOCapabilityProbe(logging.getLogger("test"), clock)
+    try:
+        restarted.start(str(cache_file))
+        clock.settle()
+        assert restarted.get_capabilities()["time"] == 1000
+    finally:
+        restarted.stop()
+
+
+def test_ready_action_errors_are_logged(caplog):
+    clock = VirtualClock()
+    probe = GPIOCapabilityProbe(logging.getLogger("test"), clock)
+
+    def on_ready():
+        raise OSError("Impossible to open the sensor")
+
+    try:
+        probe.start(None, on_ready)
+        clock.settle()
+    finally:
+        probe.stop()
+
+    assert probe.get_capabilities() is not None
+    assert "Error after the GPIO probe" in caplog.text
+    assert "Impossible to open the sensor" in caplog.text
@@ -0,0 +1,222 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+import random
+
+import pytest
+
+from octoprint_filamentbuddy.manager import GenericFilamentSensorManager, HX711WeightFilamentSensor, VirtualClock
+
+TARE = 8000  # raw units
+SCALE = 400.0  # raw units/g
+SPOOL_MASS = 200  # g
+THRESHOLD = 20  # g
+RUNOUT_TIME = 5  # s
+REINSERT_TIME = 3  # s
+
+
+class SimulatedLoadCell(HX711WeightFilamentSensor):
+    """
+    The sensor reading a simulated HX711 signal: the spool weight with gaussian noise,
+    a saturated conversion every now and then and some isolated corrupted reads.
+    """
+
+    def __init__(self, *args, silent=False, **kwargs):
+        self.grams = SPOOL_MASS + 500
+        self.silent = silent
+        self.random = random.Random(1)
+        super().__init__(*args, **kwargs)
+
+    def _open_device(self, data_pin: int, clock_pin: int) -> None:
+        pass
+
+    def _read_raw(self):
+        if self.silent:
+            return None
+        roll = self.random.random()
+        if roll < 0.03:
+            return HX711WeightFilamentSensor.INVALID_VALUES[0]
+        if roll < 0.06:
+            return self.random.randint(-0x800000, 0x7FFFFF)
+        return int(TARE + self.grams * SCALE + self.random.gauss(0, SCALE / 2))
+
+    def _close_sensor(self):
+        pass
+
+
+@pytest.fixture
+def events():
+    return {"runout": 0, "reinsert": 0, "readings": []}
+
+
+def create_sensor(clock, events, tare=TARE, scale=SCALE, reinsert=False, silent=False):
+    return SimulatedLoadCell(
+        logging.getLogger("test"),
+        lambda: events.__setitem__("runout", events["runout"] + 1),
+        events["readings"].append,
+        5,
+        6,
+        RUNOUT_TIME,
+        tare,
+        scale,
+        SPOOL_MASS,
+        THRESHOLD,
+        1,
+        (lambda: events.__setitem__("reinsert", events["reinsert"] + 1)) if reinsert else None,
+        REINSERT_TIME,
+        clock,
+        silent=silent
+    )
+
+
+def test_weight_is_filtered(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events)
+    try:
+        clock.advance(10)
+        assert sensor.get_weight() == pytest.approx(500, abs=2)
+        assert events["readings"] and all(abs(grams - 500) < 5 for grams in events["readings"][-5:])
+    finally:
+        sensor.close()
+
+
+def test_tare_and_calibrate(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events, tare=0, scale=1.0)
+    try:
+        sensor.grams = 0
+        clock.advance(10)
+        assert sensor.tare() == pytest.approx(TARE, abs=SCALE)
+
+        sensor.grams = 1000
+        clock.advance(10)
+        assert sensor.calibrate(1000) == pytest.approx(SCALE, rel=0.01)
+        with pytest.raises(ValueError):
+            sensor.calibrate(0)
+    finally:
+        sensor.close()
+
+
+def test_runout_after_runout_time(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events)
+    try:
+        sensor.start_checking()
+        clock.advance(10)
+        assert events["runout"] == 0
+
+        sensor.grams = SPOOL_MASS + THRESHOLD / 2
+        clock.advance(RUNOUT_TIME - 1)
+        assert events["runout"] == 0
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MISSING
+
+        clock.advance(3)
+        assert events["runout"] == 1
+        assert sensor.get_state() == GenericFilamentSensorManager.State.STOPPED
+    finally:
+        sensor.close()
+
+
+def test_corrupted_reads_do_not_run_out(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events)
+    try:
+        sensor.grams = SPOOL_MASS + THRESHOLD * 2
+        sensor.start_checking()
+        clock.advance(600)
+        assert events["runout"] == 0
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+    finally:
+        sensor.close()
+
+
+def test_reinsertion_after_runout(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events, reinsert=True)
+    try:
+        sensor.start_checking()
+        clock.advance(10)
+        sensor.grams = SPOOL_MASS
+        clock.advance(RUNOUT_TIME + 2)
+        assert events["runout"] == 1
+        assert sensor.is_waiting_reinsertion()
+
+        sensor.grams = SPOOL_MASS + 1000
+        clock.advance(REINSERT_TIME + 2)
+        assert events["reinsert"] == 1
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+    finally:
+        sensor.close()
+
+
+def test_manual_resume_ends_the_reinsertion_watch(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events, reinsert=True)
+    try:
+        sensor.start_checking()
+        clock.advance(10)
+        sensor.grams = SPOOL_MASS
+        clock.advance(RUNOUT_TIME + 2)
+        assert sensor.is_waiting_reinsertion()
+
+        # The print is resumed by hand without a new spool, so the run out has to be detected again
+        sensor.start_checking()
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+        clock.advance(RUNOUT_TIME + 2)
+        assert events["runout"] == 2
+        assert events["reinsert"] == 0
+    finally:
+        sensor.close()
+
+
+def test_silent_load_cell_is_a_fault(events, caplog):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events, silent=True)
+    try:
+        sensor.start_checking()
+        clock.advance(RUNOUT_TIME * 10)
+        assert events["runout"] == 0
+        assert events["readings"] == [None]
+        assert sensor.get_weight() is None
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+        assert "not producing readings" in caplog.text
+        with pytest.raises(ValueError):
+            sensor.tare()
+
+        sensor.silent = False
+        clock.advance(10)
+        assert sensor.get_weight() == pytest.approx(500, abs=2)
+        assert events["readings"][-1] == pytest.approx(500, abs=5)
+    finally:
+        sensor.close()
+
+
+def test_load_cell_going_silent_stops_the_run_out_timeout(events):
+    clock = VirtualClock()
+    sensor = create_sensor(clock, events)
+    try:
+        sensor.start_checking()
+        clock.advance(10)
+        sensor.grams = SPOOL_MASS
+        clock.advance(RUNOUT_TIME / 2)
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MISSING
+
+        sensor.silent = True
+        clock.advance(RUNOUT_TIME * 10)
+        assert events["runout"] == 0
+        assert events["readings"][-1] is None
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+    finally:
+        sensor.close()
@@ -0,0 +1,149 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import logging
+
+import pytest
+
+import octoprint_filamentbuddy
+from octoprint_filamentbuddy.manager import VirtualClock
+from octoprint_filamentbuddy.replay import ReplayHarness
+from octoprint_filamentbuddy.service import MQTTTelemetry
+
+COALESCE_TIME = 0.5  # s
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def create_telemetry(clock, broker):
+    def create(discovery_prefix=None):
+        telemetry = MQTTTelemetry(logging.getLogger("test"), broker.client, "broker", 1883, "printer/fb/", "node",
+                                  "user", "secret", discovery_prefix, COALESCE_TIME, clock)
+        telemetry.start()
+        return telemetry, broker.clients[-1]
+
+    return create
+
+
+def test_client_setup(create_telemetry):
+    telemetry, client = create_telemetry()
+    assert client.client_id == "node_telemetry"
+    assert client.credentials == ("user", "secret")
+    assert client.will == ("printer/fb/availability", "offline", 1, True)
+    assert client.connected_to == ("broker", 1883, MQTTTelemetry.KEEPALIVE)
+    assert client.looping
+
+    telemetry.stop()
+    assert client.take() == [("printer/fb/availability", "offline", 1, True)]
+    assert not client.looping
+
+
+def test_values_are_coalesced_and_published_retained(clock, create_telemetry):
+    telemetry, client = create_telemetry()
+    client.accept()
+    assert client.take() == [("printer/fb/availability", "online", 1, True)]
+
+    telemetry.publish("filament", True)
+    telemetry.publish("sensor_state", "MONITORING")
+    telemetry.publish("filament", False)
+    clock.advance(COALESCE_TIME / 2)
+    assert client.take() == []
+
+    clock.advance(COALESCE_TIME)
+    assert client.take() == [
+        ("printer/fb/filament", "OFF", 1, True),
+        ("printer/fb/sensor_state", "MONITORING", 1, True)
+    ]
+
+
+def test_only_changes_are_published(clock, create_telemetry):
+    telemetry, client = create_telemetry()
+    client.accept()
+    client.take()
+
+    telemetry.publish("pause_reason", None)
+    clock.advance(COALESCE_TIME * 2)
+    assert client.take() == [("printer/fb/pause_reason", "None", 1, True)]
+
+    telemetry.publish("pause_reason", None)
+    clock.advance(COALESCE_TIME * 2)
+    assert client.take() == []
+
+    # A flicker back to the published value within the window publishes nothing
+    telemetry.publish("pause_reason", "user")
+    telemetry.publish("pause_reason", None)
+    clock.advance(COALESCE_TIME * 2)
+    assert client.take() == []
+
+    with pytest.raises(ValueError):
+        telemetry.publish("unknown", 1)
+
+
+def test_discovery_configurations(create_telemetry):
+    telemetry, client = create_telemetry(discovery_prefix="homeassistant")
+    client.accept()
+    published = client.take()
+
+    assert published[0] == ("printer/fb/availability", "online", 1, True)
+    configs = {topic: (json.loads(payload), qos, retain) for topic, payload, qos, retain in published[1:]}
+    assert len(configs) == len(MQTTTelemetry.ENTITIES)
+
+    config, qos, retain = configs["homeassistant/binary_sensor/node/filament/config"]
+    assert (qos, retain) == (1, True)
+    assert config["unique_id"] == "node_filament"
+    assert config["state_topic"] == "printer/fb/filament"
+    assert config["availability_topic"] == "printer/fb/availability"
+    assert (config["payload_on"], config["payload_off"]) == ("ON", "OFF")
+    assert config["device"]["identifiers"] == ["node"]
+
+    config, _, _ = configs["homeassistant/sensor/node/spool_weight/config"]
+    assert config["unit_of_measurement"] == "g"
+
+
+def test_values_are_republished_on_reconnection(clock, create_telemetry):
+    telemetry, client = create_telemetry()
+    telemetry.publish("filament", True)
+    telemetry.publish("spool_weight", 412.5)
+    clock.advance(COALESCE_TIME * 2)
+    client.accept()
+    client.take()
+
+    client.accept(rc=5)
+    assert client.take() == []
+
+    client.accept()
+    assert client.take() == [
+        ("printer/fb/availability", "online", 1, True),
+        ("printer/fb/filament", "ON", 1, True),
+        ("printer/fb/spool_weight", "412.5", 1, True)
+    ]
+
+
+def test_unreachable_broker_does_not_stop_the_plugin(monkeypatch, broker):
+    monkeypatch.setattr(octoprint_filamentbuddy.mqtt, "Client", broker.client)
+    settings = {"fs": {"en": True, "polling_time": 10, "run_out_time": 60, "run_out_command": "M117 Run out",
+                       "mqtt_en": True, "mqtt_telemetry_en": True, "mqtt_address": ""}}
+    harness = ReplayHarness(settings)
+    harness.add_event(0, "PrintStarted")
+    harness.add_filament(100, False)
+    harness.add_event(1000, "PrintDone")
+    harness.run()
+
+    assert harness.gcode() == ["M117 Run out"]
+    assert any(message.get("key") == "mqtt.connection" for _, message in harness.messages)
@@ -0,0 +1,104 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import pytest
+
+from octoprint_filamentbuddy.manager import VirtualClock
+from octoprint_filamentbuddy.replay import ReplayHarness
+from octoprint_filamentbuddy.service import NotificationService
+
+RATE_LIMIT = 60  # s
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def notifications(sent, clock):
+    return NotificationService(sent.append, RATE_LIMIT, clock)
+
+
+def is_active(harness: ReplayHarness, key: str) -> bool:
+    updates = [message["type"] for _, message in harness.messages if message.get("key") == key]
+    return bool(updates) and updates[-1] != "resolve"
+
+
+def test_duplicates_are_rate_limited(notifications, sent, clock):
+    assert notifications.notify("Impossible to connect to MQTT broker", key="mqtt.connection")
+    assert not notifications.notify("Impossible to connect to MQTT broker", key="mqtt.connection")
+    assert notifications.notify("Filament runout detected", key="fs.run_out")
+
+    clock.advance(RATE_LIMIT - 1)
+    assert not notifications.notify("Impossible to connect to MQTT broker", key="mqtt.connection")
+    clock.advance(1)
+    assert notifications.notify("Impossible to connect to MQTT broker", key="mqtt.connection")
+    assert [message["key"] for message in sent] == ["mqtt.connection", "fs.run_out", "mqtt.connection"]
+
+
+def test_retained_notifications_last_until_resolved(notifications, sent, clock):
+    notifications.notify("Filament not found, starting run out timeout", key="fs.missing", retain=True)
+    clock.advance(RATE_LIMIT * 2)
+    # An active situation is not broadcast again, it is only counted
+    assert not notifications.notify("Filament not found, starting run out timeout", key="fs.missing", retain=True)
+    assert [(active["key"], active["count"]) for active in notifications.get_active()] == [("fs.missing", 2)]
+
+    notifications.resolve("fs.missing", "fs.run_out")
+    assert notifications.get_active() == []
+    assert sent[-1] == {"type": "resolve", "key": "fs.missing"}
+
+    # The same situation happening again is new, so it is not rate limited
+    assert notifications.notify("Filament not found, starting run out timeout", key="fs.missing", retain=True)
+    assert len(sent) == 3
+
+
+def test_severity_and_default_key(notifications, sent):
+    notifications.notify("Reinsertion detected", NotificationService.Severity.SUCCESS)
+    assert sent[0]["severity"] == "success"
+    assert sent[0]["key"] == "Reinsertion detected"
+    assert not sent[0]["retained"]
+
+
+def test_missing_alert_is_resolved_when_the_filament_returns():
+    harness = ReplayHarness({"fs": {"en": True, "polling_time": 10, "run_out_time": 60}})
+    harness.add_filament(0, False)
+    harness.add_event(1, "PrintStarted")
+    harness.add_filament(30, True)
+    harness.add_event(100, "PrintDone")
+    harness.run()
+
+    missing = [message for _, message in harness.messages if message.get("key") == "fs.missing"]
+    assert [message["type"] for message in missing][:2] == ["notification", "resolve"]
+    resolved_at = next(at for at, message in harness.messages
+                       if message.get("key") == "fs.missing" and message["type"] == "resolve")
+    assert resolved_at < 50
+    assert harness.gcode() == []
+
+
+def test_filament_back_before_the_first_check_raises_no_alert():
+    harness = ReplayHarness({"fs": {"en": True, "polling_time": 10, "run_out_time": 60}})
+    harness.add_filament(0, False)
+    harness.add_event(1, "PrintStarted")
+    harness.add_filament(5, True)
+    harness.add_event(3000, "PrintDone")
+    harness.run()
+
+    assert not is_active(harness, "fs.missing")
+    assert harness.gcode() == []
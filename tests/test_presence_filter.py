@@ -0,0 +1,189 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+
+import pytest
+
+import octoprint_filamentbuddy
+from octoprint_filamentbuddy.manager import AbstractPollingFilamentSensorManager, PresenceFilter, VirtualClock
+from octoprint_filamentbuddy.replay import ReplayHarness
+
+
+class ScriptedSensor:
+    """
+    The raw samples of a burst, read in order, with the waits advancing the virtual clock.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.samples = []
+        self.reads = 0
+
+    def update(self, presence_filter: PresenceFilter, samples: str, wait_f=None) -> bool:
+        """
+        :param samples: the samples as a string, "1" if the filament is seen and "0" if not
+        """
+        self.samples = [sample == "1" for sample in samples]
+        self.reads = 0
+        return presence_filter.update(self.read, wait_f or self.wait)
+
+    def read(self) -> bool:
+        sample = self.samples[self.reads]
+        self.reads += 1
+        return sample
+
+    def wait(self, seconds: float) -> bool:
+        self.clock.advance(seconds)
+        return False
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def sensor(clock):
+    return ScriptedSensor(clock)
+
+
+def test_default_filter_reads_once(sensor):
+    presence_filter = PresenceFilter()
+    assert not sensor.update(presence_filter, "0")
+    assert sensor.reads == 1
+    assert sensor.update(presence_filter, "1")
+    assert sensor.reads == 1
+
+
+def test_votes_and_hysteresis(clock, sensor):
+    presence_filter = PresenceFilter(5, 3, 4, 0, 0.01, clock)
+
+    # Two missing samples out of five are noise
+    assert sensor.update(presence_filter, "01011")
+    assert sensor.reads == 5
+    assert not sensor.update(presence_filter, "00101")
+
+    # Three samples with the filament are not enough to return, four are
+    assert not sensor.update(presence_filter, "11100")
+    assert sensor.update(presence_filter, "11110")
+    assert clock.monotonic() == pytest.approx(4 * 4 * 0.01)
+
+
+def test_stable_time_accepts_a_lasting_change(clock, sensor):
+    presence_filter = PresenceFilter(1, 1, 1, 1.0, 0.25, clock)
+
+    assert not sensor.update(presence_filter, "00000")
+    assert sensor.reads == 5
+    assert clock.monotonic() == 1.0
+
+
+def test_stable_time_rejects_a_short_change(clock, sensor):
+    presence_filter = PresenceFilter(1, 1, 1, 1.0, 0.25, clock)
+
+    assert sensor.update(presence_filter, "0001")
+    assert sensor.reads == 4
+    assert presence_filter.get_statistics()["rejected"] == 1
+
+
+def test_burst_is_truncated(sensor):
+    presence_filter = PresenceFilter(3, 2, 2, 1.0, 0.25, sensor.clock)
+
+    # Waits shorter than asked never let the change become stable
+    assert sensor.update(presence_filter, "0" * 20, wait_f=lambda seconds: False)
+    assert sensor.reads == 3 + 4 + 1
+    assert presence_filter.get_statistics()["truncated"] == 1
+
+
+def test_interrupted_burst_keeps_the_state(sensor):
+    presence_filter = PresenceFilter(5, 3, 3, 0, 0.01, sensor.clock)
+
+    assert sensor.update(presence_filter, "00000", wait_f=lambda seconds: True)
+    assert sensor.reads == 1
+
+
+def test_statistics(clock, sensor):
+    presence_filter = PresenceFilter(3, 2, 3, 0.5, 0.25, clock)
+
+    assert sensor.update(presence_filter, "011")
+    assert not sensor.update(presence_filter, "00000")
+    assert not sensor.update(presence_filter, "1110")
+    assert sensor.update(presence_filter, "11111")
+    assert presence_filter.present
+    assert presence_filter.get_statistics() == {
+        "bursts": 4,
+        "samples": 17,
+        "disagreeing": 14,
+        "missing": 1,
+        "returned": 1,
+        "rejected": 1,
+        "truncated": 0,
+        "max_burst": 5
+    }
+
+
+@pytest.mark.parametrize("arguments", [(0, 1, 1), (3, 4, 1), (3, 1, 0), (3, 1, 1, -1)])
+def test_invalid_configurations(arguments):
+    with pytest.raises(ValueError):
+        PresenceFilter(*arguments)
+
+
+class FlickeringSensor(AbstractPollingFilamentSensorManager):
+    def __init__(self, clock):
+        self.available = True
+        super().__init__(logging.getLogger("test"), lambda: None, 10, 60, "low", False, None, 0, clock,
+                         PresenceFilter(5, 4, 5, 0.1, 0.005, clock))
+
+    def is_currently_available(self):
+        return self.available
+
+    def _close_sensor(self):
+        pass
+
+
+def test_manager_exposes_the_filtered_state(clock):
+    sensor = FlickeringSensor(clock)
+    try:
+        sensor.available = False
+        assert not sensor.is_filament_present()
+
+        sensor.available = True
+        sensor.start_checking()
+        clock.advance(15)
+        sensor.available = False
+        assert sensor.is_filament_present()
+
+        clock.advance(10)
+        assert not sensor.is_filament_present()
+    finally:
+        sensor.close()
+
+
+def test_filament_status_is_the_filtered_state(monkeypatch):
+    monkeypatch.setattr(octoprint_filamentbuddy, "jsonify", lambda value: value)
+    harness = ReplayHarness({"fs": {"en": True, "polling_time": 10, "run_out_time": 60}})
+    harness.plugin.on_after_startup()
+    try:
+        harness.clock.settle()
+        harness.fire("PrintStarted")
+        harness.clock.advance_to(103)
+        harness.filament = False
+
+        # The missing filament is not confirmed until the next check
+        harness.clock.advance_to(104)
+        assert harness.plugin.on_api_command("filament_status", {})["filament"]
+        harness.clock.advance_to(120)
+        assert not harness.plugin.on_api_command("filament_status", {})["filament"]
+    finally:
+        harness.plugin.on_shutdown()
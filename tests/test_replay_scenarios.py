@@ -0,0 +1,97 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+
+import pytest
+
+import octoprint_filamentbuddy
+from octoprint_filamentbuddy.replay import ReplayHarness
+
+TWELVE_HOUR_PRINT = os.path.join(os.path.dirname(__file__), "scenarios", "twelve_hour_print.jsonl")
+REMOVER_SERIAL_LOG = os.path.join(os.path.dirname(__file__), "scenarios", "temperature_remover_serial.log")
+START_TIME = 1760000000  # 2025-10-09 08:53:20 UTC
+
+SETTINGS = {
+    "fs": {
+        "en": True,
+        "polling_time": 10,
+        "run_out_time": 60,
+        "run_out_command": "M117 Run out",
+        "auto_resume": True,
+        "reinsert_time": 3,
+        "reinsert_command": "M117 Reinserted"
+    }
+}
+
+
+def test_twelve_hour_print():
+    harness = ReplayHarness(SETTINGS, start_time=START_TIME).load_scenario(TWELVE_HOUR_PRINT).run()
+
+    # The short glitches are absorbed, only the run out at five hours pauses the print
+    assert harness.timed_gcode() == [
+        (18067.0, "M117 Run out"),
+        (pytest.approx(18303.02), "M117 Reinserted")
+    ]
+    assert [(round(at), message["type"], message["key"]) for at, message in harness.messages] == [
+        (7210, "notification", "fs.missing"),
+        (7226, "resolve", "fs.missing"),
+        (18006, "notification", "fs.missing"),
+        (18067, "resolve", "fs.missing"),
+        (18067, "notification", "fs.run_out"),
+        (18303, "resolve", "fs.run_out"),
+        (18303, "notification", "fs.resumed")
+    ]
+
+
+def test_twelve_hour_print_telemetry(monkeypatch, broker):
+    monkeypatch.setattr(octoprint_filamentbuddy.mqtt, "Client", broker.client)
+    settings = {"fs": {**SETTINGS["fs"], "mqtt_en": True, "mqtt_telemetry_en": True, "mqtt_address": "broker"}}
+    harness = ReplayHarness(settings, start_time=START_TIME).load_scenario(TWELVE_HOUR_PRINT).run()
+
+    assert len(harness.gcode()) == 2
+    telemetry, runout = broker.clients
+    published = telemetry.take()
+
+    # The sensor values are published on the scenario time, so every change of the filtered
+    # state is seen, while the short glitch the filter does not confirm is never published
+    assert [payload for topic, payload, _, _ in published if topic == "filamentbuddy/filament"] == \
+           ["ON", "OFF", "ON", "OFF", "ON"]
+    assert [payload for topic, payload, _, _ in published if topic == "filamentbuddy/sensor_state"] == [
+        "MONITORING", "MISSING", "MONITORING", "MISSING", "RUN_OUT", "MONITORING", "STOPPED", "MONITORING", "STOPPED"
+    ]
+    assert ("filamentbuddy/last_run_out", "2025-10-09T13:54:27+00:00", 1, True) in published
+    assert published[-1] == ("filamentbuddy/availability", "offline", 1, True)
+    assert runout.take() == [("FilamentBuddy", b"Filament is over", 0, False)]
+
+
+def test_filament_remover_on_temperatures():
+    settings = {"fr": {"en": True, "hook_mode": "temperature", "extrude_length": 30}}
+    harness = ReplayHarness(settings).add_event(1, "PrintStarted").add_event(610, "PrintDone")
+    harness.load_serial_log(REMOVER_SERIAL_LOG).run()
+
+    # Inserted once the nozzle is above the minimum temperature, removed when its target goes to zero
+    assert harness.timed_gcode() == [
+        (64.25, "G91"), (64.25, "G1 E30"), (64.25, "G90"),
+        (602.5, "G91"), (602.5, "G1 E-20"), (602.5, "G90")
+    ]
+
+
+def test_serial_temperatures_are_parsed_like_octoprint():
+    assert ReplayHarness.parse_temperatures("ok T:210.5 /215.0 B:60.0 /60.0 @:64 B@:0") == \
+           {"T0": (210.5, 215.0), "B": (60.0, 60.0)}
+    assert ReplayHarness.parse_temperatures("T0:200.0 /200.0 T1:25.3 /0.0 B:60.1") == \
+           {"T0": (200.0, 200.0), "T1": (25.3, 0.0), "B": (60.1, None)}
+    assert ReplayHarness.parse_temperatures("FIRMWARE_NAME:Marlin 2.1.2.1 EXTRUDER_COUNT:1") == {}
+    assert ReplayHarness.parse_temperatures("echo:busy: processing") == {}
@@ -0,0 +1,173 @@
+"""
+FilamentBuddy OctoPrint plugin
+Copyright (C) 2025 Daniele Borgo
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import logging
+
+import pytest
+
+from octoprint_filamentbuddy.manager import AbstractPollingFilamentSensorManager, GenericFilamentSensorManager, VirtualClock
+from octoprint_filamentbuddy.replay import ReplayHarness
+
+SETTINGS = {
+    "fs": {
+        "en": True,
+        "polling_time": 10,
+        "run_out_time": 60,
+        "run_out_command": "M117 Run out",
+        "auto_resume": True,
+        "reinsert_time": 3,
+        "reinsert_command": "M117 Reinserted",
+        # An empty broker address makes paho raise ValueError when connecting
+        "mqtt_en": True,
+        "mqtt_address": ""
+    }
+}
+POLLING_TIME = 10  # s
+RUNOUT_TIME = 60  # s
+REINSERT_TIME = 3  # s
+
+
+class SwitchSensor(AbstractPollingFilamentSensorManager):
+    def __init__(self, clock, runout_f, reinsert_f):
+        self.available = True
+        super().__init__(logging.getLogger("test"), runout_f, POLLING_TIME, RUNOUT_TIME, "low", False,
+                         reinsert_f, REINSERT_TIME, clock)
+
+    def is_currently_available(self):
+        return self.available
+
+    def _close_sensor(self):
+        pass
+
+
+@pytest.fixture
+def events():
+    return {"runout": 0, "reinsert": 0}
+
+
+def count(events, name, error=None):
+    def action():
+        events[name] += 1
+        if error is not None:
+            raise error
+
+    return action
+
+
+def test_failing_runout_action_keeps_watching(events, caplog):
+    clock = VirtualClock()
+    sensor = SwitchSensor(clock, count(events, "runout", OSError("Invalid host.")), count(events, "reinsert"))
+    try:
+        sensor.start_checking()
+        sensor.available = False
+        clock.advance(POLLING_TIME + RUNOUT_TIME + 2)
+        assert events["runout"] == 1
+        assert sensor.is_waiting_reinsertion()
+        assert "Error while handling the filament run out" in caplog.text
+
+        sensor.available = True
+        clock.advance(REINSERT_TIME + 1)
+        assert events["reinsert"] == 1
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+    finally:
+        sensor.close()
+
+
+def test_failing_reinsert_action_goes_back_to_monitoring(events, caplog):
+    clock = VirtualClock()
+    sensor = SwitchSensor(clock, count(events, "runout"), count(events, "reinsert", RuntimeError("printer offline")))
+    try:
+        sensor.start_checking()
+        sensor.available = False
+        clock.advance(POLLING_TIME + RUNOUT_TIME + 2)
+        sensor.available = True
+        clock.advance(REINSERT_TIME + 1)
+        assert events["reinsert"] == 1
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+        assert "Error while handling the filament reinsertion" in caplog.text
+
+        # The sensing goes on, so a new run out is detected
+        sensor.available = False
+        clock.advance(POLLING_TIME + RUNOUT_TIME + 2)
+        assert events["runout"] == 2
+    finally:
+        sensor.close()
+
+
+def test_manual_resume_ends_the_reinsertion_watch(events):
+    clock = VirtualClock()
+    sensor = SwitchSensor(clock, count(events, "runout"), count(events, "reinsert"))
+    try:
+        sensor.start_checking()
+        sensor.available = False
+        clock.advance(POLLING_TIME + RUNOUT_TIME + 2)
+        assert sensor.is_waiting_reinsertion()
+
+        # The print is resumed by hand without filament, so the run out has to be detected again
+        sensor.start_checking()
+        assert sensor.get_state() == GenericFilamentSensorManager.State.MONITORING
+        clock.advance(POLLING_TIME + RUNOUT_TIME + 2)
+        assert events["runout"] == 2
+        assert events["reinsert"] == 0
+    finally:
+        sensor.close()
+
+
+@pytest.mark.parametrize("auto_resume", [True, False])
+def test_mqtt_failure_does_not_stop_the_sensor(auto_resume):
+    settings = {"fs": {**SETTINGS["fs"], "auto_resume": auto_resume}}
+    harness = ReplayHarness(settings)
+    harness.add_event(0, "PrintStarted")
+    harness.add_filament(100, False)
+    harness.add_filament(400, True)
+    if not auto_resume:
+        harness.add_event(450, "PrintResumed")
+    harness.add_filament(1000, False)
+    harness.add_event(2000, "PrintDone")
+    harness.run()
+
+    expected = ["M117 Run out", "M117 Reinserted", "M117 Run out"] if auto_resume else ["M117 Run out"] * 2
+    assert harness.gcode() == expected
+    assert any(message.get("key") == "mqtt.connection" for _, message in harness.messages)
+
+
+def test_reinsertion_while_pausing_resumes_once_paused():
+    settings = {"fs": {**SETTINGS["fs"], "mqtt_en": False}}
+    harness = ReplayHarness(settings, pause_time=30)
+    harness.add_event(0, "PrintStarted")
+    harness.add_filament(100, False)
+    # The run out is at 171 s, so the filament is stable again while the printer is still pausing
+    harness.add_filament(175, True)
+    harness.add_filament(1000, False)
+    harness.add_event(2000, "PrintDone")
+    harness.run()
+
+    assert harness.gcode() == ["M117 Run out", "M117 Reinserted", "M117 Run out"]
+    resumed_at = harness.timed_gcode()[1][0]
+    assert 171 + 30 <= resumed_at < 171 + 31
+
+
+@pytest.mark.parametrize("auto_resume", [True, False])
+def test_manual_resume_without_filament_runs_out_again(auto_resume):
+    settings = {"fs": {**SETTINGS["fs"], "auto_resume": auto_resume, "mqtt_en": False}}
+    harness = ReplayHarness(settings)
+    harness.add_event(0, "PrintStarted")
+    harness.add_filament(100, False)
+    harness.add_event(300, "PrintResumed")
+    harness.add_event(3000, "PrintDone")
+    harness.run()
+
+    # The reinsertion watch is over, so the filament still missing is a new run out
+    assert harness.gcode() == ["M117 Run out"] * 2
+    assert 300 + 60 <= harness.timed_gcode()[1][0] <= 300 + 60 + 2 * 10